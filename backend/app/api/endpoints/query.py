@@ -512,7 +512,7 @@ async def get_performance_metrics():
         return {
             "success": True,
             "metrics": device_detector.health_metrics,
-            "recommendations": device_detector.recommendations,
+            "recommendations": list(device_detector.recommendations),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
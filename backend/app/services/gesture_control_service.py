@@ -4,6 +4,8 @@ import pyautogui
 import numpy as np
 import time
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
 import logging
 from typing import Dict, Any, Optional, List, Tuple
@@ -11,25 +13,88 @@ from datetime import datetime, timedelta
 import psutil
 import subprocess
 import platform
+import math
+import ctypes
 from ctypes import cast, POINTER
 from comtypes import CLSCTX_ALL
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernels below then run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 logger = logging.getLogger(__name__)
 
+# MediaPipe Hands landmark indices: Index, Middle, Ring, Pinky tips and their bases
+FINGER_TIPS = (8, 12, 16, 20)
+FINGER_BASES = (5, 9, 13, 17)
+
+# Per-frame landmark math, compiled with Numba when available.
+# Hand kernels take a (21, 3) float32 array of (x, y, z) landmarks.
+
+@njit(cache=True)
+def _fingers_up(lm):
+    count = 0
+    
+    # Check thumb separately
+    if lm[4, 0] < lm[3, 0]:
+        count += 1
+    
+    # Check other fingers
+    for i in range(4):
+        if lm[FINGER_TIPS[i], 1] < lm[FINGER_BASES[i], 1]:
+            count += 1
+    return count
+
+@njit(cache=True)
+def _eye_aspect_ratio(pts):
+    # pts is (12, 2): rows 0-5 left eye, rows 6-11 right eye
+    ear = 0.0
+    for o in (0, 6):
+        vertical1 = math.hypot(pts[o + 1, 0] - pts[o + 5, 0], pts[o + 1, 1] - pts[o + 5, 1])
+        vertical2 = math.hypot(pts[o + 2, 0] - pts[o + 4, 0], pts[o + 2, 1] - pts[o + 4, 1])
+        horizontal = math.hypot(pts[o, 0] - pts[o + 3, 0], pts[o, 1] - pts[o + 3, 1])
+        ear += (vertical1 + vertical2) / (2.0 * horizontal)
+    
+    # Average EAR
+    return ear / 2.0
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """Convert MediaPipe landmarks to an (N, 3) float32 array of (x, y, z)"""
+    return np.fromiter(
+        (v for p in landmarks for v in (p.x, p.y, p.z)),
+        dtype=np.float32, count=3 * len(landmarks)
+    ).reshape(-1, 3)
+
+class LASTINPUTINFO(ctypes.Structure):
+    """Win32 LASTINPUTINFO structure for GetLastInputInfo"""
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
 class GestureControlService:
     """
     Backend Gesture Control Service for SmartFix-AI
     Automatically activates when mouse is not working or after 15 seconds of inactivity
     """
     
+    # MediaPipe Face Mesh eye indices (finger indices live at module level for the kernels)
+    _LEFT_EYE_IDX = (33, 160, 158, 133, 153, 144)
+    _RIGHT_EYE_IDX = (362, 385, 387, 263, 373, 380)
+    
     def __init__(self):
         self.is_active = False
         self.is_running = False
+        # Events let waiting threads react to stop requests immediately
+        self._stop_event = threading.Event()
+        self._gesture_stop = threading.Event()
         self.auto_activate = True
         self.inactivity_threshold = 15  # seconds
         self.last_mouse_activity = time.time()
-        self.mouse_check_interval = 1  # seconds
+        self.last_mouse_pos = None
+        self.mouse_check_interval = 2  # seconds
         
         # Initialize audio control
         try:
@@ -48,23 +113,45 @@ class GestureControlService:
         # Prevent mouse from going to screen corners
         pyautogui.FAILSAFE = False
         pyautogui.MINIMUM_DURATION = 0
-        pyautogui.PAUSE = 0.01
+        pyautogui.PAUSE = 0  # Per-call sleep would be paid on every click/scroll in the frame loop
+
+        # Direct Win32 cursor positioning (a single call) where available
+        self._set_cursor_pos = None
+        if platform.system() == "Windows":
+            try:
+                self._set_cursor_pos = ctypes.windll.user32.SetCursorPos
+            except (AttributeError, OSError) as e:
+                logger.warning(f"SetCursorPos unavailable, using pyautogui: {e}")
 
         # Initialize MediaPipe Hand and Face tracking
         self.mp_hands = mp.solutions.hands
         self.mp_face_mesh = mp.solutions.face_mesh
+        # One hand drives the cursor, and the lite (complexity 0) model keeps palm detection cheap
         self.hands = self.mp_hands.Hands(
-            max_num_hands=2,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
+            max_num_hands=1,
+            model_complexity=0,
+            min_detection_confidence=0.6,
+            min_tracking_confidence=0.6
         )
         self.face_mesh = self.mp_face_mesh.FaceMesh(
             max_num_faces=1,
-            refine_landmarks=True,
+            refine_landmarks=False,  # Iris landmarks are not used
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
         self.mp_draw = mp.solutions.drawing_utils
+        
+        # Inference input size (longest side, pixels) and face mesh frame skipping
+        self.INFERENCE_MAX_SIDE = 320
+        self.FACE_MESH_FRAME_INTERVAL = 3
+        self._frame_idx = 0
+        self._small_buf = None
+        self._rgb_buf = None
+        try:
+            self._use_opencl = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        except Exception:
+            self._use_opencl = False
+        self._pool = None
 
         # Initialize camera
         self.cam = None
@@ -79,6 +166,12 @@ class GestureControlService:
         self.SCROLL_COOLDOWN_TIME = 0.2
         self.SCROLL_AMOUNT = 50
 
+        # Volume updates: minimum change (dB) and interval (seconds) between writes
+        self.VOLUME_MIN_DELTA_DB = 0.5
+        self.VOLUME_MIN_INTERVAL = 0.05
+        self._last_vol_db = None
+        self._last_vol_t = 0.0
+
         # Initialize eye blink detection
         self.BLINK_THRESHOLD = 0.25
         self.last_blink_time = time.time()
@@ -88,6 +181,8 @@ class GestureControlService:
         # Hand height range for click detection
         self.HAND_HEIGHT_MIN = 0.2
         self.HAND_HEIGHT_MAX = 0.6
+        self.CLICK_COOLDOWN_TIME = 0.3
+        self._last_click_t = 0.0
 
         # Status variables
         self.show_ui_guides = True
@@ -95,6 +190,10 @@ class GestureControlService:
         self.gesture_thread = None
         self.monitor_thread = None
         
+        # Compile the landmark kernels now rather than on the first camera frame
+        _fingers_up(np.zeros((21, 3), dtype=np.float32))
+        _eye_aspect_ratio(np.arange(24, dtype=np.float32).reshape(12, 2))
+        
         # SmartFix-AI UI elements
         self.ui_elements = {
             "assistant": {"x": self.screen_width * 0.5, "y": self.screen_height * 0.3},
@@ -104,98 +203,76 @@ class GestureControlService:
             "image_analysis": {"x": self.screen_width * 0.7, "y": self.screen_height * 0.6},
             "logs": {"x": self.screen_width * 0.3, "y": self.screen_height * 0.6},
         }
-
-    def check_mouse_activity(self) -> bool:
-        """Check if mouse is working by detecting movement"""
-        try:
-            # Get current mouse position
-            current_pos = pyautogui.position()
-            
-            # Check if mouse position has changed
-            if hasattr(self, 'last_mouse_pos'):
-                if current_pos != self.last_mouse_pos:
-                    self.last_mouse_activity = time.time()
-                    self.last_mouse_pos = current_pos
-                    return True
-            else:
-                self.last_mouse_pos = current_pos
-                return True
-                
-            # Check if mouse is responsive by trying to get position
-            pyautogui.position()
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Mouse check failed: {e}")
-            return False
+        self._ui_names = list(self.ui_elements)
+        self._ui_xy = np.array([[v["x"], v["y"]] for v in self.ui_elements.values()], dtype=np.float32)
+        self._ui_r2 = np.float32(100 * 100)
+        self._last_hover = None
+
+    def _get_idle_ms_windows(self) -> int:
+        """System-wide milliseconds since the last keyboard/mouse input (Win32)"""
+        info = LASTINPUTINFO()
+        info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+        if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+            raise ctypes.WinError()
+        # Both counters are 32-bit and wrap after ~49.7 days
+        return (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+
+    def _get_idle_seconds(self) -> float:
+        """Seconds since the last user input; raises if input can't be queried"""
+        if platform.system() == "Windows":
+            idle = self._get_idle_ms_windows() / 1000.0
+            self.last_mouse_activity = time.time() - idle
+            return idle
+        
+        # No OS idle counter available: fall back to watching the cursor position
+        current_pos = pyautogui.position()
+        if current_pos != self.last_mouse_pos:
+            self.last_mouse_pos = current_pos
+            self.last_mouse_activity = time.time()
+        return time.time() - self.last_mouse_activity
 
     def check_mouse_inactivity(self) -> bool:
         """Check if mouse has been inactive for too long"""
-        return (time.time() - self.last_mouse_activity) > self.inactivity_threshold
+        return self._get_idle_seconds() > self.inactivity_threshold
 
     def should_activate_gesture_control(self) -> bool:
         """Determine if gesture control should be activated"""
         if not self.auto_activate:
             return False
             
-        # Check if mouse is not working
-        if not self.check_mouse_activity():
+        try:
+            inactive = self.check_mouse_inactivity()
+        except Exception as e:
+            # Check if mouse is not working
+            logger.warning(f"Mouse check failed: {e}")
             logger.info("Mouse not working, activating gesture control")
             return True
             
         # Check if mouse has been inactive for too long
-        if self.check_mouse_inactivity():
+        if inactive:
             logger.info("Mouse inactive for too long, activating gesture control")
             return True
             
         return False
 
-    def check_fingers_up(self, hand_landmarks):
+    def check_fingers_up(self, lm: np.ndarray) -> int:
         """Count fingers that are up"""
-        finger_tips = [8, 12, 16, 20]  # Index, Middle, Ring, Pinky
-        finger_bases = [5, 9, 13, 17]
-        count = 0
-        
-        # Check thumb separately
-        if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x:
-            count += 1
-        
-        # Check other fingers
-        for tip, base in zip(finger_tips, finger_bases):
-            if hand_landmarks.landmark[tip].y < hand_landmarks.landmark[base].y:
-                count += 1
-                
-        return count
+        return int(_fingers_up(lm))
 
     def calculate_eye_aspect_ratio(self, landmarks, left_eye_indices, right_eye_indices):
         """Calculate eye aspect ratio for blink detection"""
-        def get_distance(p1, p2):
-            return np.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-        
-        # Left eye EAR
-        left_vertical1 = get_distance(landmarks[left_eye_indices[1]], landmarks[left_eye_indices[5]])
-        left_vertical2 = get_distance(landmarks[left_eye_indices[2]], landmarks[left_eye_indices[4]])
-        left_horizontal = get_distance(landmarks[left_eye_indices[0]], landmarks[left_eye_indices[3]])
-        left_ear = (left_vertical1 + left_vertical2) / (2.0 * left_horizontal)
-        
-        # Right eye EAR
-        right_vertical1 = get_distance(landmarks[right_eye_indices[1]], landmarks[right_eye_indices[5]])
-        right_vertical2 = get_distance(landmarks[right_eye_indices[2]], landmarks[right_eye_indices[4]])
-        right_horizontal = get_distance(landmarks[right_eye_indices[0]], landmarks[right_eye_indices[3]])
-        right_ear = (right_vertical1 + right_vertical2) / (2.0 * right_horizontal)
-        
-        # Average EAR
-        ear = (left_ear + right_ear) / 2.0
-        return ear
+        # Gather both eyes into one (12, 2) array: rows 0-5 left eye, rows 6-11 right eye
+        indices = (*left_eye_indices, *right_eye_indices)
+        pts = np.fromiter(
+            (c for i in indices for c in (landmarks[i].x, landmarks[i].y)),
+            dtype=np.float32, count=2 * len(indices)
+        ).reshape(-1, 2)
+        return float(_eye_aspect_ratio(pts))
 
     def detect_blink(self, face_landmarks) -> bool:
         """Detect eye blink using eye aspect ratio"""
-        # MediaPipe Face Mesh eye indices
-        LEFT_EYE_INDICES = [33, 160, 158, 133, 153, 144]
-        RIGHT_EYE_INDICES = [362, 385, 387, 263, 373, 380]
-        
         try:
-            ear = self.calculate_eye_aspect_ratio(face_landmarks.landmark, LEFT_EYE_INDICES, RIGHT_EYE_INDICES)
+            ear = self.calculate_eye_aspect_ratio(face_landmarks.landmark, self._LEFT_EYE_IDX, self._RIGHT_EYE_IDX)
             current_time = time.time()
             
             # Check if blink detected and enough time has passed since last blink
@@ -212,102 +289,169 @@ class GestureControlService:
             logger.warning(f"Blink detection error: {e}")
             return False
 
-    def calculate_hand_height(self, hand_landmarks) -> float:
-        """Calculate normalized hand height from landmarks"""
-        wrist_y = hand_landmarks.landmark[0].y
-        middle_mcp_y = hand_landmarks.landmark[9].y
-        return (wrist_y + middle_mcp_y) / 2
-
-    def perform_click(self, hand_landmarks):
+    def perform_click(self, lm: np.ndarray):
         """Perform mouse click based on hand gesture"""
-        hand_height = self.calculate_hand_height(hand_landmarks)
+        # A held fist would otherwise click on every frame
+        current_time = time.time()
+        if current_time - self._last_click_t < self.CLICK_COOLDOWN_TIME:
+            return
+        
+        # Hand height: average of wrist and middle finger MCP
+        hand_height = 0.5 * float(lm[0, 1] + lm[9, 1])
         
         # Map hand height to click type
         if hand_height < self.HAND_HEIGHT_MIN:
             # Low position - right click
             pyautogui.rightClick()
-            logger.info("Right click performed")
+            self._last_click_t = current_time
+            logger.debug("Right click performed")
             
         elif hand_height > self.HAND_HEIGHT_MAX:
             # High position - left click
             pyautogui.click()
-            logger.info("Left click performed")
+            self._last_click_t = current_time
+            logger.debug("Left click performed")
             
         else:
             # Middle position - no click
             pass
 
-    def control_volume(self, hand_landmarks, is_right_hand: bool):
+    def control_volume(self, lm: np.ndarray, is_right_hand: bool):
         """Control system volume based on hand position"""
         if not self.audio_available:
             return
             
-        # Use thumb tip position for volume control
-        thumb_tip = hand_landmarks.landmark[4]
-        index_tip = hand_landmarks.landmark[8]
-        
-        # Calculate vertical position (0-1 range)
-        hand_y = (thumb_tip.y + index_tip.y) / 2
+        # Use thumb and index tip positions for volume control,
+        # vertical position in 0-1 range
+        hand_y = float(lm[4, 1] + lm[8, 1]) / 2
         
         # Map hand position to volume (0-100%)
         volume_level = 1.0 - max(0, min(1, hand_y))
         
         # Convert to dB range
         db_level = self.min_vol + (volume_level * (self.max_vol - self.min_vol))
+        
+        # Write at once on an audible change, otherwise at most every VOLUME_MIN_INTERVAL so
+        # fine adjustments still land without a COM call on every frame
+        now = time.time()
+        if self._last_vol_db is not None:
+            delta = abs(db_level - self._last_vol_db)
+            if delta == 0:
+                return
+            if delta <= self.VOLUME_MIN_DELTA_DB and now - self._last_vol_t < self.VOLUME_MIN_INTERVAL:
+                return
         self.volume.SetMasterVolumeLevel(db_level, None)
+        self._last_vol_db = db_level
+        self._last_vol_t = now
 
-    def scroll_based_on_gesture(self, hand_landmarks):
+    def scroll_based_on_gesture(self, lm: np.ndarray):
         """Scroll based on hand gesture"""
         current_time = time.time()
         if current_time - self.scroll_cooldown < self.SCROLL_COOLDOWN_TIME:
             return
             
         # Check for scroll gesture (peace sign - index and middle finger up)
-        fingers_up = self.check_fingers_up(hand_landmarks)
+        fingers_up = self.check_fingers_up(lm)
         
         if fingers_up == 2:  # Peace sign
             # Determine scroll direction based on hand orientation
-            wrist_y = hand_landmarks.landmark[0].y
-            middle_tip_y = hand_landmarks.landmark[12].y
+            wrist_y = lm[0, 1]
+            middle_tip_y = lm[12, 1]
             
             if middle_tip_y < wrist_y:  # Hand facing up - scroll up
                 pyautogui.scroll(self.SCROLL_AMOUNT)
-                logger.info("Scrolled up")
+                logger.debug("Scrolled up")
             else:  # Hand facing down - scroll down
                 pyautogui.scroll(-self.SCROLL_AMOUNT)
-                logger.info("Scrolled down")
+                logger.debug("Scrolled down")
                 
             self.scroll_cooldown = current_time
 
     def navigate_ui_elements(self, x: int, y: int):
         """Navigate SmartFix-AI UI elements based on cursor position"""
-        for element_name, element_pos in self.ui_elements.items():
-            elem_x, elem_y = element_pos["x"], element_pos["y"]
-            distance = np.sqrt((x - elem_x)**2 + (y - elem_y)**2)
-            
-            # If cursor is near a UI element, highlight it (simulated)
-            if distance < 100:  # 100 pixel radius
-                logger.info(f"Hovering over {element_name}")
-                # Here you would typically send a signal to the frontend
-                # to highlight the UI element
-                break
+        # Squared distance to every element in one pass; nearest one wins
+        d2 = ((self._ui_xy - np.array((x, y), dtype=np.float32)) ** 2).sum(axis=1)
+        idx = int(d2.argmin())
+        
+        # If cursor is near a UI element, highlight it (simulated)
+        element_name = self._ui_names[idx] if d2[idx] < self._ui_r2 else None  # 100 pixel radius
+        if element_name is not None and element_name != self._last_hover:
+            # Log only on entering an element, not on every frame spent over it
+            logger.debug("Hovering over %s", element_name)
+            # Here you would typically send a signal to the frontend
+            # to highlight the UI element
+        self._last_hover = element_name
+
+    def _move_cursor(self, x: int, y: int):
+        """Move the cursor without pyautogui's per-call validation and sleeps"""
+        if self._set_cursor_pos is not None:
+            self._set_cursor_pos(int(x), int(y))
+        else:
+            pyautogui.moveTo(x, y, _pause=False)
+
+    def _get_inference_pool(self) -> ThreadPoolExecutor:
+        """Return the worker that runs FaceMesh alongside Hands inference"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gesture-inference")
+        return self._pool
+
+    def _prepare_inference_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale and convert a BGR camera frame to RGB in persistent buffers"""
+        # MediaPipe cost scales with pixel count; landmarks are normalized so
+        # inference on a downscaled frame needs no coordinate correction
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.INFERENCE_MAX_SIDE / max(height, width))
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        
+        if self._use_opencl:
+            # Resize/convert on the OpenCL device; download only the small RGB result
+            umat = cv2.UMat(frame)
+            if scale < 1.0:
+                umat = cv2.resize(umat, size, interpolation=cv2.INTER_AREA)
+            rgb_frame = cv2.cvtColor(umat, cv2.COLOR_BGR2RGB).get()
+            rgb_frame.flags.writeable = False
+            return rgb_frame
+        
+        if scale < 1.0:
+            if self._small_buf is None or self._small_buf.shape[:2] != (size[1], size[0]):
+                self._small_buf = np.empty((size[1], size[0], 3), dtype=frame.dtype)
+            frame = cv2.resize(frame, size, dst=self._small_buf, interpolation=cv2.INTER_AREA)
+        
+        # Buffers are (re)allocated only when the camera resolution changes
+        if self._rgb_buf is None or self._rgb_buf.shape != frame.shape:
+            self._rgb_buf = np.empty_like(frame)
+        self._rgb_buf.flags.writeable = True
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        
+        # A read-only input lets MediaPipe skip its defensive copy
+        rgb_frame.flags.writeable = False
+        return rgb_frame
 
     def process_gestures(self, frame):
         """Process hand and face gestures from camera frame"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame = self._prepare_inference_frame(frame)
+        
+        # Blinks span several frames, so the face mesh only needs every Nth frame.
+        # Hands and FaceMesh are separate graphs that release the GIL and only read
+        # the (read-only) frame, so on those frames FaceMesh runs on the worker while
+        # Hands runs here; other frames call Hands inline with no pool round-trip
+        self._frame_idx += 1
+        face_future = None
+        if self._frame_idx % self.FACE_MESH_FRAME_INTERVAL == 0:
+            face_future = self._get_inference_pool().submit(self.face_mesh.process, rgb_frame)
+        
         hand_results = self.hands.process(rgb_frame)
-        face_results = self.face_mesh.process(rgb_frame)
+        face_results = face_future.result() if face_future is not None else None
         
         # Process hand gestures
         if hand_results.multi_hand_landmarks:
             for hand_landmarks in hand_results.multi_hand_landmarks:
-                # Get hand center for cursor control
-                wrist = hand_landmarks.landmark[0]
-                index_mcp = hand_landmarks.landmark[5]
+                # Convert the landmark protos once; every helper indexes this array
+                lm = landmarks_to_array(hand_landmarks.landmark)
                 
-                # Calculate hand center
-                hand_x = (wrist.x + index_mcp.x) / 2
-                hand_y = (wrist.y + index_mcp.y) / 2
+                # Calculate hand center (wrist and index MCP) for cursor control
+                hand_x = float(lm[0, 0] + lm[5, 0]) / 2
+                hand_y = float(lm[0, 1] + lm[5, 1]) / 2
                 
                 # Convert to screen coordinates with smoothing
                 screen_x = int(hand_x * self.screen_width)
@@ -318,26 +462,26 @@ class GestureControlService:
                 smooth_y = int(self.prev_y * self.smoothing + screen_y * (1 - self.smoothing))
                 
                 # Move mouse cursor
-                pyautogui.moveTo(smooth_x, smooth_y, duration=0.01)
+                self._move_cursor(smooth_x, smooth_y)
                 self.prev_x, self.prev_y = smooth_x, smooth_y
                 
                 # Navigate UI elements
                 self.navigate_ui_elements(smooth_x, smooth_y)
                 
                 # Check for gestures
-                fingers_up = self.check_fingers_up(hand_landmarks)
+                fingers_up = self.check_fingers_up(lm)
                 
                 if fingers_up == 0:  # Fist - click
-                    self.perform_click(hand_landmarks)
+                    self.perform_click(lm)
                 elif fingers_up == 1:  # Pointing - volume control
-                    self.control_volume(hand_landmarks, True)
+                    self.control_volume(lm, True)
                 elif fingers_up == 2:  # Peace - scroll
-                    self.scroll_based_on_gesture(hand_landmarks)
+                    self.scroll_based_on_gesture(lm)
                 elif fingers_up == 5:  # Open hand - activate/deactivate
                     self.toggle_activation()
         
         # Process face gestures (blink for special actions)
-        if face_results.multi_face_landmarks:
+        if face_results is not None and face_results.multi_face_landmarks:
             for face_landmarks in face_results.multi_face_landmarks:
                 if self.detect_blink(face_landmarks):
                     # Double blink for emergency action
@@ -350,63 +494,153 @@ class GestureControlService:
     def start_camera(self):
         """Start camera capture"""
         try:
-            self.cam = cv2.VideoCapture(0)
+            # DirectShow negotiates compressed high-FPS modes that the default MSMF backend often doesn't
+            if platform.system() == "Windows":
+                self.cam = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+            else:
+                self.cam = cv2.VideoCapture(0)
             if not self.cam.isOpened():
                 logger.error("Cannot open camera")
                 return False
+            
+            # Request MJPG at 640x480@30; drivers ignore properties they can't honour
+            self.cam.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            self.cam.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            self.cam.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            self.cam.set(cv2.CAP_PROP_FPS, 30)
+            # Keep only the newest frame in the driver queue to avoid stale-frame latency
+            self.cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             return True
         except Exception as e:
             logger.error(f"Camera start error: {e}")
             return False
 
     def stop_camera(self):
-        """Stop camera capture"""
+        """Stop camera capture (HighGUI windows belong to the display thread, which closes them)"""
         if self.cam:
             self.cam.release()
-        cv2.destroyAllWindows()
 
     def gesture_control_loop(self):
-        """Main gesture control loop"""
+        """
+        Main gesture control loop.
+        Runs as a three-stage pipeline: a reader thread decodes camera frames, this thread
+        runs MediaPipe inference and gesture actions, and a display thread renders the debug
+        window. Bounded queues keep at most two frames in flight between stages.
+        """
         if not self.start_camera():
             logger.error("Failed to start camera")
             return
             
         logger.info("Gesture control activated")
         
-        while self.is_active and self.is_running:
+        read_q = queue.Queue(maxsize=2)
+        write_q = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        
+        reader = threading.Thread(target=self._reader_loop, args=(read_q, stop), daemon=True)
+        display = threading.Thread(target=self._display_loop, args=(write_q, stop), daemon=True)
+        reader.start()
+        display.start()
+        
+        try:
+            # Frames are processed one at a time here, so no MediaPipe graph is ever called
+            # concurrently with itself; process_gestures overlaps Hands with FaceMesh
+            while not (self._gesture_stop.is_set() or self._stop_event.is_set() or stop.is_set()):
+                try:
+                    item = read_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                _, frame = item
+                
+                # Process gestures
+                self.process_gestures(frame)
+                
+                # Display debug info if enabled
+                if self.show_debug:
+                    cv2.putText(frame, "Gesture Control Active", (10, 30), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                    self._queue_put(write_q, frame, stop)
+        finally:
+            stop.set()
+            self._queue_put_nowait(write_q, None)
+            display.join(timeout=1)
+            # Releasing the capture while cam.read() is still blocked in the reader can crash the backend
+            reader.join(timeout=1)
+            if reader.is_alive():
+                logger.warning("Camera read still blocked, waiting before releasing the camera")
+                reader.join()
+            self.stop_camera()
+            
+        logger.info("Gesture control deactivated")
+
+    def _reader_loop(self, read_q: queue.Queue, stop: threading.Event):
+        """Pipeline stage 1: decode camera frames into the read queue"""
+        idx = 0
+        while not stop.is_set():
             ret, frame = self.cam.read()
             if not ret:
                 logger.warning("Failed to capture frame")
                 continue
-                
-            # Process gestures
-            self.process_gestures(frame)
+            if not self._queue_put(read_q, (idx, frame), stop):
+                break
+            idx += 1
+        self._queue_put_nowait(read_q, None)
+
+    def _display_loop(self, write_q: queue.Queue, stop: threading.Event):
+        """Pipeline stage 3: render annotated frames and poll the exit key"""
+        while True:
+            try:
+                frame = write_q.get(timeout=0.5)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            if frame is None:
+                break
+            cv2.imshow('Gesture Control', frame)
             
-            # Display debug info if enabled
-            if self.show_debug:
-                cv2.putText(frame, "Gesture Control Active", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.imshow('Gesture Control', frame)
-                
             # Check for exit key
             if cv2.waitKey(1) & 0xFF == ord('q'):
+                stop.set()
                 break
-                
-        self.stop_camera()
-        logger.info("Gesture control deactivated")
+        cv2.destroyAllWindows()
+
+    @staticmethod
+    def _queue_put(q: queue.Queue, item, stop: threading.Event) -> bool:
+        """Blocking put that gives up once the pipeline is stopping"""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _queue_put_nowait(q: queue.Queue, item):
+        """Put a shutdown sentinel, dropping a stale frame if the queue is full"""
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            try:
+                q.get_nowait()
+                q.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                pass
 
     def monitor_mouse_activity(self):
         """Monitor mouse activity and auto-activate gesture control"""
-        while self.is_running:
+        while not self._stop_event.wait(self.mouse_check_interval):
             if self.should_activate_gesture_control() and not self.is_active:
                 self.activate_gesture_control()
-                
-            time.sleep(self.mouse_check_interval)
 
     def activate_gesture_control(self):
         """Activate gesture control"""
         if not self.is_active:
             self.is_active = True
+            self._gesture_stop.clear()
             logger.info("Gesture control activated")
             
             # Start gesture control in a separate thread
@@ -418,6 +652,7 @@ class GestureControlService:
         """Deactivate gesture control"""
         if self.is_active:
             self.is_active = False
+            self._gesture_stop.set()
             logger.info("Gesture control deactivated")
 
     def toggle_activation(self):
@@ -434,6 +669,7 @@ class GestureControlService:
             return
             
         self.is_running = True
+        self._stop_event.clear()
         logger.info("Starting Gesture Control Service")
         
         # Start mouse monitoring thread
@@ -448,7 +684,17 @@ class GestureControlService:
             return
             
         self.is_running = False
+        self._stop_event.set()
         self.deactivate_gesture_control()
+        if self.monitor_thread is not None:
+            self.monitor_thread.join(timeout=2)
+        
+        # Let the gesture loop finish its current frame before releasing the inference workers
+        if self.gesture_thread is not None and self.gesture_thread is not threading.current_thread():
+            self.gesture_thread.join(timeout=2)
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
         logger.info("Gesture Control Service stopped")
 
     def get_status(self) -> Dict[str, Any]:
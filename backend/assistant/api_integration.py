@@ -3,7 +3,10 @@
 import os
 import sys
 import json
+import re
 import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 
 # Add the assistant directory to the path
@@ -19,6 +22,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bulleted ("- step") or numbered ("1. step") lines in a generated answer; group 1 is the step text
+STEP_LINE_RE = re.compile(r'^[ \t]*(?:-[ \t]*|\d{1,3}\.[ \t]*)(.+?)[ \t]*$', re.MULTILINE)
+
 class AssistantAPI:
     """API integration for the SmartFix AI assistant"""
     
@@ -38,6 +44,7 @@ class AssistantAPI:
         
         logger.info("Initializing Assistant API...")
         self.assistant = LLMAssistant()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="assistant")
         self._initialized = True
         logger.info("Assistant API initialized")
     
@@ -54,30 +61,27 @@ class AssistantAPI:
                     if device_type or os_info:
                         enhanced_query = f"{query} [Device: {device_type}, OS: {os_info}]"
             
-            # Process the query
-            answer = self.assistant.process_query(enhanced_query)
-            
-            # Get the top hit for solution steps and confidence
-            hits = self.assistant.retrieve(enhanced_query, k=1)
+            # Process the query and get the top hit for solution steps and confidence.
+            # Both are blocking model calls, so run them off the event loop.
+            loop = asyncio.get_running_loop()
+            answer, hits = await asyncio.gather(
+                loop.run_in_executor(self._executor, self.assistant.process_query, enhanced_query),
+                loop.run_in_executor(self._executor, self.assistant.retrieve, enhanced_query, 1)
+            )
             
             solution_steps = []
             confidence = 0.0
             
+            # Limit to top 5 most important steps for better UX
             if hits:
                 _, meta = hits[0]
                 # Get solution steps directly from the metadata
-                solution_steps = meta.get('solution_steps', [])
+                solution_steps = meta.get('solution_steps', [])[:5]
                 confidence = meta.get('confidence_score', 0.0)
             
             # If no solution steps were found in metadata, try to extract from answer
             if not solution_steps:
-                for line in answer.split('\n'):
-                    if line.strip().startswith('-') or (line.strip() and line.strip()[0].isdigit() and '.' in line[:3]):
-                        solution_steps.append(line.strip().lstrip('- ').lstrip('0123456789. '))
-            
-            # Limit to top 5 most important steps for better UX
-            if len(solution_steps) > 5:
-                solution_steps = solution_steps[:5]
+                solution_steps = STEP_LINE_RE.findall(answer)[:5]
             
             return {
                 "success": True,
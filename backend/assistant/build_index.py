@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 # build_index.py - Creates a FAISS vector index from troubleshooting database
-import json
+import orjson
 import os
+from operator import itemgetter
 import numpy as np
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
+from kb_format import format_llm_block
 import logging
 
 # Configure logging
@@ -19,67 +22,137 @@ DB_PATH = os.path.join("data", "troubleshooting_solutions_1000plus.json")
 INDEX_PATH = os.path.join("faiss_index", "troubleshoot.index")
 EMB_PATH = os.path.join("faiss_index", "embeddings.npy")
 META_PATH = os.path.join("faiss_index", "meta.json")
+META_COLS_PATH = os.path.join("faiss_index", "meta.npz")
+
+# Record fields copied into the metadata, with the value used when a record lacks one
+META_FIELDS = (
+    "problem_text", "solution_steps", "device_category", "problem_type",
+    "confidence_score", "success_rate", "symptoms", "error_codes"
+)
+RECORD_DEFAULTS = {
+    "problem_text": None, "solution_steps": [], "device_category": None, "problem_type": None,
+    "confidence_score": None, "success_rate": None, "symptoms": "", "error_codes": []
+}
+
+# Encode batch sizes (larger batches keep the GPU busy)
+CPU_BATCH_SIZE = 32
+GPU_BATCH_SIZE = 256
+
+# HNSW graph parameters (neighbours per node, build-time search depth)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+def record_text(record, headers):
+    """Retrieval text for one record; headers caches the shared "device | type" line"""
+    key = (record.get('device_category', ''), record.get('problem_type', ''))
+    header = headers.get(key)
+    if header is None:
+        header = headers[key] = f"{key[0]} | {key[1]}"
+    
+    # Skip the join for records without error codes
+    if error_codes := record.get('error_codes'):
+        error_line = "Error codes: " + ", ".join(error_codes)
+    else:
+        error_line = "Error codes: "
+    
+    return "\n".join((
+        header,
+        f"Problem: {record.get('problem_text', '')}",
+        f"Symptoms: {record.get('symptoms', '')}",
+        error_line
+    ))
+
+def object_column(values):
+    """Pack values into a 1-D object array (np.array would turn equal-length lists into 2-D)"""
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+def save_columnar_meta(meta, path):
+    """Save metadata as parallel arrays so loaders skip building a dict per record"""
+    np.savez(
+        path,
+        idx=np.arange(len(meta), dtype="int32"),
+        confidence_score=np.array([m["confidence_score"] or 0.0 for m in meta], dtype="float64"),
+        success_rate=np.array([m["success_rate"] or 0.0 for m in meta], dtype="float64"),
+        **{
+            field: object_column([m[field] for m in meta])
+            for field in ("problem_text", "solution_steps", "device_category",
+                          "problem_type", "symptoms", "error_codes", "llm_block")
+        }
+    )
 
 def main():
-    logger.info("Loading embedding model...")
+    use_gpu = torch.cuda.is_available()
+    logger.info(f"Loading embedding model on {'GPU (FP16)' if use_gpu else 'CPU'}...")
     # Small but effective model that can run offline after first download
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    model = SentenceTransformer(
+        "sentence-transformers/all-MiniLM-L6-v2", device="cuda" if use_gpu else "cpu"
+    )
+    if use_gpu:
+        model.half()  # FP16 halves memory traffic; embeddings are cast back to float32 below
     
     logger.info(f"Loading troubleshooting database from {DB_PATH}...")
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        records = json.load(f)
+    with open(DB_PATH, "rb") as f:
+        records = orjson.loads(f.read())
     
     logger.info(f"Processing {len(records)} troubleshooting records...")
-    texts = []
-    meta = []
+    # Combine useful fields for retrieval
+    headers = {}
+    texts = [record_text(record, headers) for record in records]
     
-    for i, record in enumerate(records):
-        # Combine useful fields for retrieval
-        chunk = f"{record.get('device_category', '')} | {record.get('problem_type', '')}\n" \
-                f"Problem: {record.get('problem_text', '')}\n" \
-                f"Symptoms: {record.get('symptoms', '')}\n" \
-                f"Error codes: {', '.join(record.get('error_codes', []))}"
-        
-        texts.append(chunk)
-        meta.append({
-            "idx": i,
-            "problem_text": record.get("problem_text"),
-            "solution_steps": record.get("solution_steps", []),
-            "device_category": record.get("device_category"),
-            "problem_type": record.get("problem_type"),
-            "confidence_score": record.get("confidence_score"),
-            "success_rate": record.get("success_rate"),
-            "symptoms": record.get("symptoms", ""),
-            "error_codes": record.get("error_codes", [])
-        })
+    get_fields = itemgetter(*META_FIELDS)
+    meta = [
+        {"idx": i, **dict(zip(META_FIELDS, get_fields({**RECORD_DEFAULTS, **record})))}
+        for i, record in enumerate(records)
+    ]
+    # Pre-render the LLM prompt block so queries only join strings
+    for m in meta:
+        m["llm_block"] = format_llm_block(m)
     
     logger.info(f"Generating embeddings for {len(texts)} texts...")
-    embeddings = model.encode(
-        texts, 
-        batch_size=32, 
+    # Encode in length order so each batch pads to similar lengths, then restore record order
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    sorted_embeddings = model.encode(
+        [texts[i] for i in order], 
+        batch_size=GPU_BATCH_SIZE if use_gpu else CPU_BATCH_SIZE, 
         convert_to_numpy=True, 
         show_progress_bar=True
     )
+    embeddings = np.empty_like(sorted_embeddings)
+    embeddings[order] = sorted_embeddings
     
-    # Normalize embeddings for cosine similarity
+    # Normalize embeddings in place for cosine similarity
     logger.info("Normalizing embeddings...")
-    embeddings_norm = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    faiss.normalize_L2(embeddings)
     
     # Create and save FAISS index
     logger.info("Creating FAISS index...")
     dimension = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dimension)
-    index.add(embeddings_norm.astype("float32"))
+    # HNSW graph over fp16 scalar-quantized vectors: half the bytes read per distance.
+    # The assistants only load it above BRUTE_FORCE_MAX_VECTORS (10k) records; smaller
+    # knowledge bases are searched exactly over embeddings.npy
+    index = faiss.IndexHNSWSQ(
+        dimension, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.train(embeddings)
+    index.add(embeddings)
     
     logger.info(f"Saving index to {INDEX_PATH}...")
     faiss.write_index(index, INDEX_PATH)
     
     logger.info(f"Saving embeddings to {EMB_PATH}...")
-    np.save(EMB_PATH, embeddings_norm)
+    np.save(EMB_PATH, embeddings)
     
     logger.info(f"Saving metadata to {META_PATH}...")
-    with open(META_PATH, "w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False, indent=2)
+    with open(META_PATH, "wb") as f:
+        f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+    
+    logger.info(f"Saving columnar metadata to {META_COLS_PATH}...")
+    save_columnar_meta(meta, META_COLS_PATH)
     
     logger.info(f"Index built successfully with {len(meta)} items")
     logger.info(f"Index dimension: {dimension}")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+# kb_format.py - Rendering of knowledge-base records, shared by build_index and the assistants
+# (standard library only, so the offline index builder can import it without the runtime stack)
+from typing import Dict, Any
+
+def format_llm_block(m: Dict[str, Any]) -> str:
+    """Render one knowledge-base record as a CONTEXT block for the LLM prompt"""
+    lines = [
+        f"Problem: {m.get('problem_text', '')}\n",
+        f"Device: {m.get('device_category', '')} | Type: {m.get('problem_type', '')}\n",
+        f"Symptoms: {m.get('symptoms', '')}\n"
+    ]
+    
+    if m.get("error_codes"):
+        lines.append(f"Error codes: {', '.join(m.get('error_codes', []))}\n")
+    
+    lines.append("Steps: \n")
+    for j, step in enumerate(m.get("solution_steps", []), 1):
+        lines.append(f"{j}. {step}\n")
+    
+    lines.append(f"Confidence: {m.get('confidence_score', 0)}, Success rate: {m.get('success_rate', 0)}\n")
+    return "".join(lines)
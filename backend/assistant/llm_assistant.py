@@ -1,14 +1,21 @@
 #!/usr/bin/env python
 # llm_assistant.py - Enhanced assistant with local LLM for natural dialog and reasoning
 import os
+import re
 import sys
-import json
 import time
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
+import threading
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# Shared retrieval core (sets the BLAS/torch thread counts before numpy/torch load).
+# Imported relatively when loaded as assistant.llm_assistant by the FastAPI backend.
+try:
+    from .retrieval import RetrievalMixin, load_embedding_model
+    from .kb_format import format_llm_block
+except ImportError:
+    from retrieval import RetrievalMixin, load_embedding_model
+    from kb_format import format_llm_block
 
 # Configure logging
 logging.basicConfig(
@@ -21,22 +28,43 @@ logger = logging.getLogger(__name__)
 ASSISTANT_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(ASSISTANT_DIR, "data", "troubleshooting_solutions_1000plus.json")
 INDEX_PATH = os.path.join(ASSISTANT_DIR, "faiss_index", "troubleshoot.index")
+EMB_PATH = os.path.join(ASSISTANT_DIR, "faiss_index", "embeddings.npy")
 META_PATH = os.path.join(ASSISTANT_DIR, "faiss_index", "meta.json")
+META_COLS_PATH = os.path.join(ASSISTANT_DIR, "faiss_index", "meta.npz")
 LLM_MODEL_PATH = os.path.join(ASSISTANT_DIR, "models", "llama-3-8b-instruct.gguf")
 
-class LLMAssistant:
+# Token budget for conversation history in the LLM prompt
+HISTORY_TOKEN_BUDGET = 512
+
+# Sampling settings shared by the blocking and streaming generation paths
+GENERATION_KWARGS = dict(
+    max_tokens=512,
+    temperature=0.2,
+    top_p=0.9,
+    stop=["</s>", "User:", "CONTEXT:"],
+    echo=False
+)
+
+# End of a streamed sentence: .!? after a non-digit (so "1." step numbers stay attached), or a line break
+SENTENCE_END = re.compile(r"(?<=[^\d\s][.!?])\s+|\n+")
+
+KB_UNAVAILABLE_MESSAGE = "I'm sorry, but my knowledge base is currently unavailable. Please make sure the index has been built by running build_index.py."
+
+class LLMAssistant(RetrievalMixin):
     """Enhanced assistant with local LLM for natural dialog and reasoning"""
     
-    def __init__(self):
-        """Initialize the LLM assistant"""
+    def __init__(self, n_threads: Optional[int] = None):
+        """Initialize the LLM assistant (n_threads caps llama.cpp's CPU threads; default all cores)"""
+        self.n_threads = n_threads or os.cpu_count() or 8
         self.load_resources()
         self.conversation_history = []
+        self._llm_lock = threading.Lock()
         self.llm_available = self._check_llm_available()
     
     def load_resources(self):
         """Load the embedding model, FAISS index, and metadata"""
         logger.info("Loading embedding model...")
-        self.emb_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.emb_model = load_embedding_model()
         
         # Check if index exists
         if not os.path.exists(INDEX_PATH):
@@ -48,12 +76,7 @@ class LLMAssistant:
             
         self.index_available = True
         
-        logger.info(f"Loading FAISS index from {INDEX_PATH}...")
-        self.index = faiss.read_index(INDEX_PATH)
-        
-        logger.info(f"Loading metadata from {META_PATH}...")
-        with open(META_PATH, "r", encoding="utf-8") as f:
-            self.meta = json.load(f)
+        self._load_knowledge_base(EMB_PATH, INDEX_PATH, META_COLS_PATH, META_PATH)
         
         logger.info(f"Assistant ready with {len(self.meta)} solutions in knowledge base")
     
@@ -68,12 +91,22 @@ class LLMAssistant:
             logger.info("Loading LLM model...")
             from llama_cpp import Llama
             
-            self.llm = Llama(
+            llm_kwargs = dict(
                 model_path=LLM_MODEL_PATH,
                 n_ctx=4096,
-                n_threads=4,
-                n_batch=512
+                n_threads=self.n_threads,
+                n_batch=1024,
+                use_mlock=True,
+                use_mmap=True,
+                flash_attn=True,
+                logits_all=False
             )
+            try:
+                # Offload every layer to the GPU when llama.cpp was built with GPU support
+                self.llm = Llama(n_gpu_layers=-1, **llm_kwargs)
+            except Exception as e:
+                logger.warning(f"GPU offload failed ({e}), loading LLM on CPU")
+                self.llm = Llama(n_gpu_layers=0, **llm_kwargs)
             logger.info("LLM loaded successfully")
             return True
             
@@ -84,30 +117,6 @@ class LLMAssistant:
             logger.error(f"Error loading LLM: {e}")
             return False
     
-    def embed(self, query: str) -> np.ndarray:
-        """Embed a query using the embedding model"""
-        vector = self.emb_model.encode([query], convert_to_numpy=True)[0]
-        vector = vector / np.linalg.norm(vector)  # Normalize for cosine similarity
-        return vector.astype("float32").reshape(1, -1)
-    
-    def retrieve(self, query: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
-        """Retrieve the top k most relevant solutions for a query"""
-        # Check if index is available
-        if not hasattr(self, 'index_available') or not self.index_available:
-            logger.warning("Index not available, returning empty results")
-            return []
-            
-        vector = self.embed(query)
-        scores, indices = self.index.search(vector, k)
-        
-        hits = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self.meta):  # Ensure valid index
-                m = self.meta[idx]
-                hits.append((float(score), m))
-        
-        return hits
-    
     def format_rag_response(self, query: str, hits: List[Tuple[float, Dict[str, Any]]]) -> str:
         """Generate a RAG-based response from the retrieved hits"""
         if not hits:
@@ -133,65 +142,97 @@ class LLMAssistant:
         # Return only the response text - the solution steps will be returned separately
         return response
     
-    def synthesize_llm_response(self, query: str, hits: List[Tuple[float, Dict[str, Any]]]) -> str:
-        """Generate a response using the LLM based on retrieved context"""
-        if not self.llm_available or not hits:
-            return self.format_rag_response(query, hits)
+    def _history_context(self) -> str:
+        """Most recent conversation turns that fit in HISTORY_TOKEN_BUDGET prompt tokens"""
+        turns = []
+        used_tokens = 0
+        for turn in reversed(self.conversation_history):
+            text = f"User: {turn['user']}\nAssistant: {turn['assistant']}\n"
+            n_tokens = len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
+            if used_tokens + n_tokens >= HISTORY_TOKEN_BUDGET:
+                break
+            turns.append(text)
+            used_tokens += n_tokens
         
-        # Build context from top hits
-        context = ""
-        for i, (score, m) in enumerate(hits[:3], 1):
-            context += f"\n### Doc {i}\n"
-            context += f"Problem: {m.get('problem_text', '')}\n"
-            context += f"Device: {m.get('device_category', '')} | Type: {m.get('problem_type', '')}\n"
-            context += f"Symptoms: {m.get('symptoms', '')}\n"
-            
-            if m.get("error_codes"):
-                context += f"Error codes: {', '.join(m.get('error_codes', []))}\n"
-            
-            context += f"Steps: \n"
-            for j, step in enumerate(m.get("solution_steps", []), 1):
-                context += f"{j}. {step}\n"
-            
-            context += f"Confidence: {m.get('confidence_score', 0)}, Success rate: {m.get('success_rate', 0)}\n"
+        if not turns:
+            return ""
+        return "Previous conversation:\n" + "".join(reversed(turns))
+    
+    def _build_prompt(self, query: str, hits: List[Tuple[float, Dict[str, Any]]]) -> str:
+        """LLM prompt for a query from its top hits and the recent conversation"""
+        # Build context from top hits (blocks are pre-rendered by build_index.py)
+        context = "".join(
+            f"\n### Doc {i}\n{m.get('llm_block') or format_llm_block(m)}"
+            for i, (score, m) in enumerate(hits[:3], 1)
+        )
         
-        # Build prompt with conversation history
-        history_context = ""
-        if self.conversation_history:
-            history_context = "Previous conversation:\n"
-            for turn in self.conversation_history[-3:]:  # Last 3 turns
-                history_context += f"User: {turn['user']}\n"
-                history_context += f"Assistant: {turn['assistant']}\n"
+        history_context = self._history_context()
         
-        # Create the prompt
+        # Create the prompt (stable system + CONTEXT prefix first, so llama.cpp's prefix matching
+        # against the tokens already in its context skips re-prefilling it on follow-ups)
         prompt = f"""You are a technical troubleshooting assistant for SmartFix AI. Use ONLY the information in the CONTEXT section to help solve the user's problem. If you don't have enough information, ask clarifying questions.
 
-{history_context}
-
 CONTEXT:
 {context}
 
+{history_context}
+
 User issue: {query}
 
 Respond with a friendly, helpful answer. Include numbered steps for solutions. If multiple solutions are possible, explain which one to try first and why. If you need more information to diagnose the problem correctly, ask 1-2 specific questions.
 """
+        return prompt
+    
+    def synthesize_llm_response(self, query: str, hits: List[Tuple[float, Dict[str, Any]]]) -> str:
+        """Generate a response using the LLM based on retrieved context"""
+        if not self.llm_available or not hits:
+            return self.format_rag_response(query, hits)
         
-        # Generate response
+        prompt = self._build_prompt(query, hits)
+        
+        # Generate response (llama.cpp contexts are not safe to use from several threads)
         try:
-            output = self.llm(
-                prompt=prompt,
-                max_tokens=512,
-                temperature=0.2,
-                top_p=0.9,
-                stop=["</s>", "User:", "CONTEXT:"],
-                echo=False
-            )
+            with self._llm_lock:
+                output = self.llm(prompt=prompt, **GENERATION_KWARGS)
             response = output["choices"][0]["text"].strip()
             return response
         except Exception as e:
             logger.error(f"Error generating LLM response: {e}")
             return self.format_rag_response(query, hits)
     
+    def stream_llm_response(self, query: str, hits: List[Tuple[float, Dict[str, Any]]]) -> Iterator[str]:
+        """Yield the LLM response a sentence at a time while it is still being generated
+        
+        Each piece keeps its trailing whitespace, so joining them gives the full response.
+        """
+        if not self.llm_available or not hits:
+            yield self.format_rag_response(query, hits)
+            return
+        
+        prompt = self._build_prompt(query, hits)
+        pending = ""
+        started = False
+        try:
+            with self._llm_lock:
+                for chunk in self.llm(prompt=prompt, stream=True, **GENERATION_KWARGS):
+                    pending += chunk["choices"][0]["text"]
+                    if not started:
+                        pending = pending.lstrip()
+                    start = 0
+                    for match in SENTENCE_END.finditer(pending):
+                        yield pending[start:match.end()]
+                        started = True
+                        start = match.end()
+                    pending = pending[start:]
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {e}")
+            if not started:
+                yield self.format_rag_response(query, hits)
+            return
+        
+        if pending.strip():
+            yield pending.rstrip()
+    
     def process_query(self, query: str, k: int = 5) -> str:
         """Process a user query and return an answer"""
         start_time = time.time()
@@ -199,7 +240,7 @@ Respond with a friendly, helpful answer. Include numbered steps for solutions. I
         # Check if index is available
         if not hasattr(self, 'index_available') or not self.index_available:
             logger.warning("Index not available, returning fallback response")
-            return "I'm sorry, but my knowledge base is currently unavailable. Please make sure the index has been built by running build_index.py."
+            return KB_UNAVAILABLE_MESSAGE
         
         # Retrieve relevant solutions
         hits = self.retrieve(query, k=k)
@@ -220,6 +261,30 @@ Respond with a friendly, helpful answer. Include numbered steps for solutions. I
         logger.info(f"Query processed in {elapsed:.2f} seconds")
         
         return answer
+    
+    def process_query_stream(self, query: str, k: int = 5) -> Iterator[str]:
+        """Process a user query, yielding the answer in sentence-sized pieces as it is generated"""
+        start_time = time.time()
+        
+        if not hasattr(self, 'index_available') or not self.index_available:
+            logger.warning("Index not available, returning fallback response")
+            yield KB_UNAVAILABLE_MESSAGE
+            return
+        
+        hits = self.retrieve(query, k=k)
+        
+        pieces = []
+        for piece in self.stream_llm_response(query, hits):
+            pieces.append(piece)
+            yield piece
+        
+        self.conversation_history.append({
+            "user": query,
+            "assistant": "".join(pieces).strip()
+        })
+        
+        elapsed = time.time() - start_time
+        logger.info(f"Query streamed in {elapsed:.2f} seconds")
 
 def main():
     """Main function to run the LLM assistant"""
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# retrieval.py - Embedding, metadata and vector search shared by the assistants
+import os
+import orjson
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+
+# Let the BLAS backend behind the MiniLM GEMMs use every core (read when numpy/torch load)
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+os.environ.setdefault("MKL_NUM_THREADS", str(os.cpu_count() or 1))
+
+import numpy as np
+import faiss
+from faiss.contrib.exhaustive_search import knn
+import torch
+torch.set_num_threads(max(1, os.cpu_count() or 1))
+try:
+    torch.set_num_interop_threads(2)
+except RuntimeError:
+    pass  # Already configured elsewhere in this process
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# Paths
+ASSISTANT_DIR = os.path.dirname(os.path.abspath(__file__))
+ONNX_EMB_DIR = os.path.join(ASSISTANT_DIR, "models", "onnx_minilm")
+ONNX_EMB_MODEL_PATH = os.path.join(ONNX_EMB_DIR, "model.int8.onnx")
+
+# Search depth for HNSW indexes (ignored for flat indexes built by older versions)
+HNSW_EF_SEARCH = 64
+
+# Up to this many vectors, search the raw embedding matrix exactly instead of loading the index.
+# The HNSW/fp16-SQ troubleshoot.index is therefore only read for knowledge bases above this
+# size; the shipped 1000-record KB always takes the exact path.
+BRUTE_FORCE_MAX_VECTORS = 10000
+
+# LRU cache of normalized query embeddings (query text -> float32 bytes)
+EMBED_CACHE_SIZE = 512
+_embed_cache = OrderedDict()
+_embed_cache_lock = threading.Lock()
+
+class OnnxEmbedder:
+    """int8-quantized MiniLM on ONNX Runtime, exposing the subset of SentenceTransformer.encode we use"""
+    
+    def __init__(self, model_dir: str = ONNX_EMB_DIR, model_path: str = ONNX_EMB_MODEL_PATH):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = os.cpu_count() or 1
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+    
+    def encode(self, sentences: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Mean-pooled sentence embeddings as a (len(sentences), dimension) float32 array"""
+        embeddings = np.empty((len(sentences), self.dimension), dtype="float32")
+        
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            tokens = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=256, return_tensors="np"
+            )
+            feeds = {name: tokens[name].astype("int64") for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            
+            mask = tokens["attention_mask"][..., None].astype("float32")
+            embeddings[start:start + len(batch)] = (
+                (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            )
+        
+        if normalize_embeddings:
+            faiss.normalize_L2(embeddings)
+        return embeddings
+
+class MetaRecord:
+    """Read-only, dict-like view of one row of the columnar metadata"""
+    __slots__ = ("cols", "idx")
+    
+    def __init__(self, cols: Dict[str, np.ndarray], idx: int):
+        self.cols = cols
+        self.idx = idx
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self.cols[key][self.idx]
+        return value.item() if isinstance(value, np.generic) else value
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self.cols else default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.cols}
+
+class ColumnarMeta:
+    """Sequence over the parallel metadata arrays in meta.npz, yielding MetaRecord views"""
+    
+    def __init__(self, cols: Dict[str, np.ndarray]):
+        self.cols = cols
+        self._size = len(cols["idx"])
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getitem__(self, idx: int) -> MetaRecord:
+        return MetaRecord(self.cols, int(idx))
+
+def load_meta(meta_cols_path: str, meta_path: str):
+    """Load the knowledge-base metadata, preferring the columnar meta.npz over meta.json"""
+    if os.path.exists(meta_cols_path):
+        logger.info(f"Loading metadata from {meta_cols_path}...")
+        with np.load(meta_cols_path, allow_pickle=True) as npz:
+            return ColumnarMeta({name: npz[name] for name in npz.files})
+    
+    logger.info(f"Loading metadata from {meta_path}...")
+    with open(meta_path, "rb") as f:
+        return orjson.loads(f.read())
+
+def load_embedding_model():
+    """Load the int8 ONNX embedder if it has been exported, else the PyTorch SentenceTransformer"""
+    if os.path.exists(ONNX_EMB_MODEL_PATH):
+        try:
+            logger.info(f"Loading quantized ONNX embedding model from {ONNX_EMB_DIR}...")
+            return OnnxEmbedder()
+        except ImportError:
+            logger.warning("onnxruntime/transformers not installed. Falling back to SentenceTransformer.")
+        except Exception as e:
+            logger.error(f"Error loading ONNX embedding model: {e}")
+    
+    return SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+
+class RetrievalMixin:
+    """Query embedding and top-k search over the knowledge base
+    
+    Hosts set self.emb_model and self.index_available, then call _load_knowledge_base().
+    """
+    
+    def _load_knowledge_base(self, emb_path: str, index_path: str, meta_cols_path: str, meta_path: str):
+        """Load the embeddings, the FAISS index (large knowledge bases only) and the metadata"""
+        # Memory-map the embeddings and index so their pages are shared between worker processes
+        logger.info(f"Loading embeddings from {emb_path}...")
+        self.xb = np.ascontiguousarray(np.load(emb_path, mmap_mode="r"), dtype="float32")
+        
+        if len(self.xb) <= BRUTE_FORCE_MAX_VECTORS:
+            # Small knowledge base: exact knn over self.xb beats loading and querying an index
+            self.index = None
+        else:
+            logger.info(f"Loading FAISS index from {index_path}...")
+            self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            if hasattr(self.index, "hnsw"):
+                self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        
+        self.meta = load_meta(meta_cols_path, meta_path)
+    
+    def _embed_cached(self, query: str) -> bytes:
+        """Return the normalized embedding of a query as raw float32 bytes, using the LRU cache"""
+        with _embed_cache_lock:
+            cached = _embed_cache.get(query)
+            if cached is not None:
+                _embed_cache.move_to_end(query)
+                return cached
+        
+        # The model normalizes for cosine similarity; tobytes() is the only copy we make
+        vector = self.emb_model.encode(
+            [query], convert_to_numpy=True, normalize_embeddings=True,
+            output_value="sentence_embedding"
+        )
+        cached = vector.astype("float32", copy=False).tobytes()
+        
+        with _embed_cache_lock:
+            _embed_cache[query] = cached
+            if len(_embed_cache) > EMBED_CACHE_SIZE:
+                _embed_cache.popitem(last=False)
+        return cached
+    
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query using the embedding model"""
+        return np.frombuffer(self._embed_cached(query), dtype="float32").reshape(1, -1)
+    
+    def _search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Inner-product search over the knowledge base, exact for small ones"""
+        if self.index is None:
+            return knn(vectors, self.xb, k, metric=faiss.METRIC_INNER_PRODUCT)
+        return self.index.search(vectors, k)
+    
+    def _gather_hits(self, scores: np.ndarray, indices: np.ndarray) -> List[Tuple[float, Dict[str, Any]]]:
+        """Pair one row of search results with metadata, dropping invalid (-1 / out of range) ids"""
+        mask = (indices >= 0) & (indices < len(self.meta))
+        return list(zip(scores[mask].tolist(), [self.meta[idx] for idx in indices[mask]]))
+    
+    def retrieve(self, query: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Retrieve the top k most relevant solutions for a query"""
+        # Check if index is available
+        if not hasattr(self, 'index_available') or not self.index_available:
+            logger.warning("Index not available, returning empty results")
+            return []
+            
+        vector = self.embed(query)
+        scores, indices = self._search(vector, k)
+        
+        return self._gather_hits(scores[0], indices[0])
+    
+    def retrieve_batch(self, queries: List[str], k: int = 5) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """Retrieve the top k solutions for several queries with one encode and one search call"""
+        if not hasattr(self, 'index_available') or not self.index_available:
+            logger.warning("Index not available, returning empty results")
+            return [[] for _ in queries]
+        
+        vectors = self.emb_model.encode(
+            queries, batch_size=32, convert_to_numpy=True, normalize_embeddings=True
+        )
+        scores, indices = self._search(np.ascontiguousarray(vectors, dtype="float32"), k)
+        
+        return [
+            self._gather_hits(row_scores, row_indices)
+            for row_scores, row_indices in zip(scores, indices)
+        ]
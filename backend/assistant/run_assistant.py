@@ -1,10 +1,9 @@
 #!/usr/bin/env python
 # run_assistant.py - Simple RAG-based Q&A system using the troubleshooting database
-import json
 import os
-import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
+
+# Shared retrieval core (sets the BLAS/torch thread counts before numpy/torch load)
+from retrieval import RetrievalMixin, load_embedding_model
 import logging
 import sys
 import time
@@ -19,9 +18,11 @@ logger = logging.getLogger(__name__)
 # Paths
 DB_PATH = os.path.join("data", "troubleshooting_solutions_1000plus.json")
 INDEX_PATH = os.path.join("faiss_index", "troubleshoot.index")
+EMB_PATH = os.path.join("faiss_index", "embeddings.npy")
 META_PATH = os.path.join("faiss_index", "meta.json")
+META_COLS_PATH = os.path.join("faiss_index", "meta.npz")
 
-class TroubleshootingAssistant:
+class TroubleshootingAssistant(RetrievalMixin):
     def __init__(self):
         """Initialize the troubleshooting assistant"""
         self.load_resources()
@@ -29,7 +30,7 @@ class TroubleshootingAssistant:
     def load_resources(self):
         """Load the embedding model, FAISS index, and metadata"""
         logger.info("Loading embedding model...")
-        self.emb_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+        self.emb_model = load_embedding_model()
         
         # Check if index exists
         if not os.path.exists(INDEX_PATH):
@@ -37,34 +38,11 @@ class TroubleshootingAssistant:
             logger.info("Please run build_index.py first to create the index")
             sys.exit(1)
         
-        logger.info(f"Loading FAISS index from {INDEX_PATH}...")
-        self.index = faiss.read_index(INDEX_PATH)
-        
-        logger.info(f"Loading metadata from {META_PATH}...")
-        with open(META_PATH, "r", encoding="utf-8") as f:
-            self.meta = json.load(f)
+        self.index_available = True
+        self._load_knowledge_base(EMB_PATH, INDEX_PATH, META_COLS_PATH, META_PATH)
         
         logger.info(f"Assistant ready with {len(self.meta)} solutions in knowledge base")
     
-    def embed(self, query):
-        """Embed a query using the embedding model"""
-        vector = self.emb_model.encode([query], convert_to_numpy=True)[0]
-        vector = vector / np.linalg.norm(vector)  # Normalize for cosine similarity
-        return vector.astype("float32").reshape(1, -1)
-    
-    def retrieve(self, query, k=5):
-        """Retrieve the top k most relevant solutions for a query"""
-        vector = self.embed(query)
-        scores, indices = self.index.search(vector, k)
-        
-        hits = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self.meta):  # Ensure valid index
-                m = self.meta[idx]
-                hits.append((float(score), m))
-        
-        return hits
-    
     def answer_from_hits(self, query, hits):
         """Generate an answer from the retrieved hits"""
         if not hits:
@@ -22,34 +22,72 @@ logger = logging.getLogger(__name__)
 MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
 FAISS_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "faiss_index")
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+ONNX_EMB_DIR = os.path.join(MODELS_DIR, "onnx_minilm")
+
+# Embedding model exported to ONNX for the quantized embedder
+EMB_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 # Model URLs
 LLM_MODEL_URL = "https://huggingface.co/TheBloke/Llama-3-8B-Instruct-GGUF/resolve/main/llama-3-8b-instruct.Q4_K_M.gguf"
-WHISPER_MODEL_URL = "https://huggingface.co/ggerganov/whisper.cpp/resolve/main/ggml-tiny.en.bin"
+WHISPER_MODEL_URL = "https://huggingface.co/ggerganov/whisper.cpp/resolve/main/ggml-tiny.en-q5_1.bin"
 PIPER_MODEL_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main/en/en_US/ryan/medium/en_US-ryan-medium.onnx"
 PIPER_CONFIG_URL = "https://huggingface.co/rhasspy/piper-voices/resolve/main/en/en_US/ryan/medium/en_US-ryan-medium.onnx.json"
 
+# Read/write downloads in 1 MiB chunks (multi-GB models would otherwise take millions of tiny writes)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 def download_file(url, destination, description=None):
-    """Download a file with progress bar"""
-    if os.path.exists(destination):
+    """Download a file with progress bar, resuming a partial download if one exists"""
+    existing_size = os.path.getsize(destination) if os.path.exists(destination) else 0
+    
+    try:
+        head = requests.head(url, allow_redirects=True, timeout=30)
+        head.raise_for_status()
+        expected_size = int(head.headers.get('content-length', 0))
+    except requests.RequestException as e:
+        logger.warning(f"Could not get the size of {url} ({e})")
+        expected_size = 0
+    
+    # Only a size match proves an existing file is complete
+    if existing_size and existing_size == expected_size:
         logger.info(f"File already exists: {destination}")
         return
     
-    logger.info(f"Downloading {description or url} to {destination}")
+    if expected_size and existing_size > expected_size:
+        existing_size = 0  # Larger than the remote file, so start over
     
     os.makedirs(os.path.dirname(destination), exist_ok=True)
     
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
+    headers = {'Range': f'bytes={existing_size}-'} if existing_size else {}
+    response = requests.get(url, stream=True, headers=headers, timeout=30)
+    if existing_size and response.status_code == 416:
+        # Nothing left past our offset: complete if the server's total matches, else start over
+        if response.headers.get('content-range', '').endswith(f"/{existing_size}"):
+            logger.info(f"File already exists: {destination}")
+            return
+        existing_size = 0
+        response = requests.get(url, stream=True, timeout=30)
+    # Raise before opening the destination so an error page never overwrites a good partial file
+    response.raise_for_status()
+    if existing_size and response.status_code != 206:
+        existing_size = 0  # Server ignored the Range header and is sending the whole file
+    
+    if existing_size:
+        logger.info(f"Resuming {description or url} at {existing_size} of {expected_size} bytes")
+    else:
+        logger.info(f"Downloading {description or url} to {destination}")
     
-    with open(destination, 'wb') as f, tqdm(
+    total_size = expected_size or existing_size + int(response.headers.get('content-length', 0))
+    
+    with open(destination, 'ab' if existing_size else 'wb') as f, tqdm(
         desc=os.path.basename(destination),
         total=total_size,
+        initial=existing_size,
         unit='B',
         unit_scale=True,
         unit_divisor=1024,
     ) as bar:
-        for data in response.iter_content(chunk_size=1024):
+        for data in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
             size = f.write(data)
             bar.update(size)
 
@@ -76,6 +114,47 @@ def install_dependencies():
     
     return True
 
+def download_faster_whisper():
+    """Fetch the CTranslate2 Whisper model used by faster-whisper, if it is installed"""
+    try:
+        from faster_whisper import download_model
+    except ImportError:
+        logger.info("faster-whisper not installed, skipping its model download")
+        return
+    
+    output_dir = os.path.join(MODELS_DIR, "faster-whisper-tiny.en")
+    if os.path.isdir(output_dir):
+        logger.info(f"File already exists: {output_dir}")
+        return
+    
+    logger.info(f"Downloading faster-whisper model to {output_dir}")
+    download_model("tiny.en", output_dir=output_dir)
+
+def quantize_piper_voice(model_path):
+    """Write an int8 dynamically-quantized copy of a Piper voice next to the FP32 model"""
+    quantized_path = model_path[:-len(".onnx")] + ".int8.onnx"
+    if os.path.exists(quantized_path):
+        logger.info(f"File already exists: {quantized_path}")
+        return
+    
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        logger.info("onnxruntime not installed, skipping Piper voice quantization")
+        return
+    
+    logger.info(f"Quantizing Piper voice to {quantized_path}")
+    try:
+        quantize_dynamic(
+            model_path,
+            quantized_path,
+            op_types_to_quantize=["MatMul", "Gemm"],
+            per_channel=True,
+            weight_type=QuantType.QInt8
+        )
+    except Exception as e:
+        logger.error(f"Error quantizing Piper voice: {e}")
+
 def download_models(args):
     """Download models"""
     if args.llm:
@@ -83,14 +162,45 @@ def download_models(args):
         download_file(LLM_MODEL_URL, llm_path, "LLM model")
     
     if args.whisper:
-        whisper_path = os.path.join(MODELS_DIR, "whisper-tiny.bin")
-        download_file(WHISPER_MODEL_URL, whisper_path, "Whisper model")
+        whisper_path = os.path.join(MODELS_DIR, "ggml-tiny-q5_1.bin")
+        download_file(WHISPER_MODEL_URL, whisper_path, "Whisper model (Q5_1)")
+        download_faster_whisper()
     
     if args.piper:
         piper_model_path = os.path.join(MODELS_DIR, "piper", "en_US-ryan-medium.onnx")
         piper_config_path = os.path.join(MODELS_DIR, "piper", "en_US-ryan-medium.onnx.json")
         download_file(PIPER_MODEL_URL, piper_model_path, "Piper TTS model")
         download_file(PIPER_CONFIG_URL, piper_config_path, "Piper TTS config")
+        quantize_piper_voice(piper_model_path)
+
+def export_onnx_embedder():
+    """Export the embedding model to ONNX and quantize it to int8"""
+    quantized_path = os.path.join(ONNX_EMB_DIR, "model.int8.onnx")
+    if os.path.exists(quantized_path):
+        logger.info(f"File already exists: {quantized_path}")
+        return True
+    
+    logger.info("Exporting embedding model to ONNX...")
+    
+    try:
+        from optimum.exporters.onnx import main_export
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        
+        main_export(EMB_MODEL_NAME, output=ONNX_EMB_DIR, task="feature-extraction")
+        quantize_dynamic(
+            os.path.join(ONNX_EMB_DIR, "model.onnx"),
+            quantized_path,
+            weight_type=QuantType.QInt8
+        )
+        logger.info("ONNX embedding model exported successfully")
+    except ImportError:
+        logger.error("optimum and onnxruntime are required to export the ONNX embedding model")
+        return False
+    except Exception as e:
+        logger.error(f"Error exporting ONNX embedding model: {e}")
+        return False
+    
+    return True
 
 def build_index():
     """Build the vector index"""
@@ -112,13 +222,14 @@ def main():
     parser.add_argument("--llm", action="store_true", help="Download LLM model")
     parser.add_argument("--whisper", action="store_true", help="Download Whisper model")
     parser.add_argument("--piper", action="store_true", help="Download Piper TTS model")
+    parser.add_argument("--onnx", action="store_true", help="Export quantized ONNX embedding model")
     parser.add_argument("--index", action="store_true", help="Build vector index")
     parser.add_argument("--all", action="store_true", help="Do everything")
     
     args = parser.parse_args()
     
     # If no arguments provided, show help
-    if not (args.deps or args.llm or args.whisper or args.piper or args.index or args.all):
+    if not (args.deps or args.llm or args.whisper or args.piper or args.onnx or args.index or args.all):
         parser.print_help()
         return
     
@@ -133,6 +244,10 @@ def main():
     if args.llm or args.whisper or args.piper or args.all:
         download_models(args if not args.all else argparse.Namespace(llm=True, whisper=True, piper=True))
     
+    # Export ONNX embedding model
+    if args.onnx or args.all:
+        export_onnx_embedder()
+    
     # Build index
     if args.index or args.all:
         build_index()
@@ -18,7 +18,8 @@ async def test_rag():
     """Test the basic RAG-based assistant"""
     from run_assistant import TroubleshootingAssistant
     
-    assistant = TroubleshootingAssistant()
+    # Model loading and inference block, so run them off the event loop
+    assistant = await asyncio.to_thread(TroubleshootingAssistant)
     
     # Test queries
     test_queries = [
@@ -33,9 +34,12 @@ async def test_rag():
     print("Testing RAG-based Assistant")
     print("="*50)
     
-    for query in test_queries:
+    # Embed and search all queries in one batch
+    batch_hits = await asyncio.to_thread(assistant.retrieve_batch, test_queries, k=1)
+    
+    for query, hits in zip(test_queries, batch_hits):
         print(f"\nQuery: {query}")
-        answer = assistant.process_query(query, k=1)
+        answer = assistant.answer_from_hits(query, hits)
         print(f"Answer: {answer[:200]}...")
         print("-"*50)
 
@@ -44,7 +48,7 @@ async def test_llm():
     try:
         from llm_assistant import LLMAssistant
         
-        assistant = LLMAssistant()
+        assistant = await asyncio.to_thread(LLMAssistant)
         
         if not assistant.llm_available:
             print("LLM not available. Skipping LLM test.")
@@ -61,9 +65,12 @@ async def test_llm():
         print("Testing LLM-enhanced Assistant")
         print("="*50)
         
-        for query in test_queries:
+        # Embed and search all queries in one batch; only generation runs per query
+        batch_hits = await asyncio.to_thread(assistant.retrieve_batch, test_queries, k=1)
+        
+        for query, hits in zip(test_queries, batch_hits):
             print(f"\nQuery: {query}")
-            answer = assistant.process_query(query, k=1)
+            answer = await asyncio.to_thread(assistant.synthesize_llm_response, query, hits)
             print(f"Answer: {answer[:200]}...")
             print("-"*50)
     
@@ -73,9 +80,12 @@ async def test_llm():
 async def test_api_integration():
     """Test the API integration"""
     try:
-        from api_integration import get_assistant_api
+        def load_assistant_api():
+            # Importing api_integration builds the global AssistantAPI (and its models)
+            from api_integration import get_assistant_api
+            return get_assistant_api()
         
-        assistant_api = get_assistant_api()
+        assistant_api = await asyncio.to_thread(load_assistant_api)
         
         # Test queries
         test_queries = [
@@ -115,14 +125,18 @@ async def main():
     if not (args.rag or args.llm or args.api):
         args.all = True
     
-    if args.rag or args.all:
-        await test_rag()
-    
-    if args.llm or args.all:
-        await test_llm()
+    # test_llm and test_api_integration each load their own copy of the local LLM, so they
+    # run one after the other; only the RAG test overlaps with them
+    async def run_llm_tests():
+        if args.llm or args.all:
+            await test_llm()
+        if args.api or args.all:
+            await test_api_integration()
     
-    if args.api or args.all:
-        await test_api_integration()
+    tests = [run_llm_tests()]
+    if args.rag or args.all:
+        tests.append(test_rag())
+    await asyncio.gather(*tests)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -2,12 +2,30 @@
 # voice_assistant.py - Voice-enabled assistant with STT and TTS capabilities
 import os
 import sys
+import asyncio
 import time
 import logging
 import threading
 import queue
+import ctypes
 import json
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterator
+
+import numpy as np
+
+# Audio I/O backends are optional; without them the assistant falls back to text mode
+try:
+    import pyaudio
+    HAS_PYAUDIO = True
+except ImportError:
+    HAS_PYAUDIO = False
+
+try:
+    import sounddevice as sd
+    HAS_SOUNDDEVICE = True
+except (ImportError, OSError):  # OSError when the PortAudio library itself is missing
+    HAS_SOUNDDEVICE = False
 
 # Import the LLM assistant
 from llm_assistant import LLMAssistant
@@ -20,79 +38,304 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Paths
-WHISPER_MODEL_PATH = os.path.join("models", "whisper-tiny.bin")
+WHISPER_MODEL_PATH = os.path.join("models", "ggml-tiny-q5_1.bin")
+WHISPER_FP32_MODEL_PATH = os.path.join("models", "whisper-tiny.bin")  # Pre-quantization download
+FASTER_WHISPER_MODEL = "tiny.en"
+FASTER_WHISPER_MODEL_DIR = os.path.join("models", "faster-whisper-tiny.en")
+FUSED_MEL_VERSION = "1.2."  # faster-whisper release the fused Mel front end was checked against
+
+# Microphone capture: 30 ms frames (a frame size WebRTC VAD accepts) at 16 kHz mono
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 480
+BLOCK_FRAMES = 8           # Frames fetched per stream read (~240 ms)
+BLOCK_SAMPLES = FRAME_SAMPLES * BLOCK_FRAMES
+MAX_RECORD_SECONDS = 15    # Upper bound on a single utterance
+NO_SPEECH_SECONDS = 4      # Give up if nothing is heard this long after listening starts
+VAD_AGGRESSIVENESS = 2
+VAD_SILENCE_FRAMES = 25    # ~0.75 s of silence after speech ends the utterance
+ENERGY_THRESHOLD = 500     # int16 RMS counted as speech when webrtcvad is unavailable
+
+# Split the cores between the LLM, STT and TTS stages, which the voice pipeline runs at the
+# same time, so their thread pools don't oversubscribe the CPU; generation gets the largest share
+CPU_COUNT = os.cpu_count() or 1
+LLM_THREADS = max(1, CPU_COUNT // 2)
+STT_THREADS = max(1, CPU_COUNT // 4)
+TTS_THREADS = max(1, CPU_COUNT - LLM_THREADS - STT_THREADS)
+
+# Opt-in: mlockall() after warmup. It pins every mapping in the process (LLM, embeddings,
+# index, torch), not just the voice models, so it is off unless VOICE_MLOCK=true
+VOICE_MLOCK = os.getenv("VOICE_MLOCK", "False").lower() == "true"
+
+# Pending items allowed between voice pipeline stages before capture waits
+PIPELINE_QUEUE_SIZE = 8
+
+# Console banners, built once
+BANNER = "=" * 50
+VOICE_HEADER = (
+    f"\n{BANNER}\nSmartFix AI Voice Assistant\n{BANNER}\n"
+    f"Press Enter to start listening, or type 'exit' to quit\n{BANNER}\n"
+)
+TEXT_HEADERS = {
+    llm_available: (
+        f"\n{BANNER}\nSmartFix AI Troubleshooting Assistant\n{BANNER}\n{mode}\n"
+        f"Ask a troubleshooting question (type 'exit' to quit)\n{BANNER}\n"
+    )
+    for llm_available, mode in (
+        (True, "Running with local LLM for enhanced responses"),
+        (False, "Running in RAG-only mode (no LLM)"),
+    )
+}
+
+# LRU sizes for repeated questions: answers are small, synthesized waveforms are not
+ANSWER_CACHE_SIZE = 256
+TTS_CACHE_SIZE = 32
 PIPER_MODEL_DIR = os.path.join("models", "piper")
 
+def _scan_piper_voices(model_dir):
+    """Snapshot the Piper voices in model_dir as (model_path, config_path) pairs
+    
+    One os.scandir pass; the int8 copy made by setup.py --piper is preferred as the model,
+    and the config may be "<voice>.onnx.json" or "<voice>.json". None if the directory is missing.
+    """
+    try:
+        with os.scandir(model_dir) as entries:
+            names = {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return None
+    
+    voices = []
+    for name in sorted(names):
+        if not name.endswith('.onnx') or name.endswith('.int8.onnx'):
+            continue
+        stem = name[:-len('.onnx')]
+        config = next((path for path in (name + '.json', stem + '.json') if path in names), None)
+        if config is None:
+            logger.warning(f"Voice config not found: {name}.json")
+            continue
+        model = stem + '.int8.onnx' if stem + '.int8.onnx' in names else name
+        voices.append((os.path.join(model_dir, model), os.path.join(model_dir, config)))
+    return voices
+
+_PIPER_VOICES = _scan_piper_voices(PIPER_MODEL_DIR)
+
+def _fuse_mel_frontend(extractor):
+    """Swap faster-whisper's log-Mel front end for a fused one
+    
+    The stock extractor rebuilds the Hann window, takes a complex magnitude and
+    allocates a new array for every clip/log/scale step. Here the window is built
+    once, the power spectrum comes straight from the real/imag parts and the log
+    post-processing runs in place on the Mel buffer. Output matches the original
+    for faster-whisper 1.2.x; any other version keeps the stock extractor.
+    """
+    import faster_whisper
+    from faster_whisper.feature_extractor import FeatureExtractor
+    
+    required = ("n_fft", "hop_length", "mel_filters", "sampling_rate", "n_samples", "nb_max_frames")
+    version = getattr(faster_whisper, "__version__", "")
+    if (
+        not version.startswith(FUSED_MEL_VERSION)
+        or type(extractor) is not FeatureExtractor
+        or not all(hasattr(extractor, name) for name in required)
+    ):
+        logger.info(f"Keeping stock Mel front end for faster-whisper {version or 'unknown'}")
+        return extractor
+    
+    window = np.hanning(extractor.n_fft + 1)[:-1].astype(np.float32)
+    
+    class FusedFeatureExtractor(FeatureExtractor):
+        def __call__(self, waveform, padding=160, chunk_length=None):
+            if chunk_length is not None:
+                self.n_samples = chunk_length * self.sampling_rate
+                self.nb_max_frames = self.n_samples // self.hop_length
+            
+            waveform = np.asarray(waveform, dtype=np.float32)
+            if padding:
+                waveform = np.pad(waveform, (0, padding))
+            half = self.n_fft // 2
+            waveform = np.pad(waveform, (half, half), mode="reflect")
+            
+            # Hop-strided frames; the last frame is dropped as in the stock extractor
+            frames = np.lib.stride_tricks.sliding_window_view(waveform, self.n_fft)[::self.hop_length][:-1]
+            spectrum = np.fft.rfft(frames * window, axis=-1)
+            power = np.square(spectrum.real, dtype=np.float32)
+            power += np.square(spectrum.imag, dtype=np.float32)
+            
+            log_spec = self.mel_filters @ power.T
+            np.maximum(log_spec, 1e-10, out=log_spec)
+            np.log10(log_spec, out=log_spec)
+            np.maximum(log_spec, log_spec.max() - 8.0, out=log_spec)
+            log_spec += 4.0
+            log_spec /= 4.0
+            return log_spec
+    
+    extractor.__class__ = FusedFeatureExtractor
+    return extractor
+
 class VoiceAssistant:
     """Voice-enabled assistant with STT and TTS capabilities"""
     
     def __init__(self):
         """Initialize the voice assistant"""
-        self.llm_assistant = LLMAssistant()
+        self.llm_assistant = LLMAssistant(n_threads=LLM_THREADS)
+        self._pcm_buffer = None
+        self._pcm_f32 = None
+        self.stt_device = None
+        self.pyaudio = None
+        self._mic_stream = None
+        self._answer_cache = OrderedDict()
+        self._tts_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._audio_lock = threading.Lock()  # Mic capture and playback never overlap
         self.stt_available = self._init_stt()
         self.tts_available = self._init_tts()
+        
+        # Warm the STT/TTS models in the background so the first utterance doesn't pay for it
+        self._warm = threading.Event()
+        threading.Thread(target=self._prewarm, daemon=True, name="voice-prewarm").start()
         self.audio_queue = queue.Queue()
         self.is_listening = False
         self.wake_word_detected = threading.Event()
     
     def _init_stt(self) -> bool:
         """Initialize the speech-to-text system"""
+        if not HAS_PYAUDIO:
+            logger.warning("PyAudio not installed, no microphone input")
+            logger.info("Install faster-whisper (or whisper_cpp) and pyaudio for voice input")
+            return False
+        
         try:
-            # Try to import whisper.cpp Python bindings
-            from whisper_cpp import Whisper
-            
-            if not os.path.exists(WHISPER_MODEL_PATH):
-                logger.warning(f"Whisper model not found at {WHISPER_MODEL_PATH}")
+            if not self._load_whisper():
                 logger.info("STT not available. Using text-only mode.")
                 return False
             
-            logger.info(f"Loading Whisper model from {WHISPER_MODEL_PATH}...")
-            self.whisper = Whisper(WHISPER_MODEL_PATH)
-            logger.info("Whisper model loaded successfully")
-            
-            # Try to import PyAudio for microphone input
-            import pyaudio
             self.pyaudio = pyaudio.PyAudio()
+            # Opened once and only started/stopped per utterance, so the audio device isn't
+            # reconfigured on every listen()
+            self._mic_stream = self.pyaudio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=SAMPLE_RATE,
+                input=True,
+                frames_per_buffer=BLOCK_SAMPLES,
+                start=False
+            )
+            
+            # Voice activity detection lets listen() stop when the user stops talking
+            try:
+                import webrtcvad
+                self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+            except ImportError:
+                self.vad = None
+                logger.info("webrtcvad not installed, using an energy threshold to detect speech")
             
             return True
         except ImportError as e:
             logger.warning(f"STT dependencies not available: {e}")
-            logger.info("Install whisper_cpp and pyaudio for voice input")
+            logger.info("Install faster-whisper (or whisper_cpp) and pyaudio for voice input")
             return False
         except Exception as e:
             logger.error(f"Error initializing STT: {e}")
             return False
     
+    @staticmethod
+    def _cuda_available() -> bool:
+        """Check whether CTranslate2 can see a CUDA device"""
+        try:
+            import ctranslate2
+            return ctranslate2.get_cuda_device_count() > 0
+        except Exception:
+            return False
+    
+    def _load_whisper(self) -> bool:
+        """Load faster-whisper (CTranslate2 int8) if installed, otherwise whisper.cpp"""
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            WhisperModel = None
+        
+        if WhisperModel is not None:
+            # Prefer the copy fetched by setup.py so no network access is needed
+            model = FASTER_WHISPER_MODEL_DIR if os.path.isdir(FASTER_WHISPER_MODEL_DIR) else FASTER_WHISPER_MODEL
+            self.whisper = None
+            if self._cuda_available():
+                # int8 weights with fp16 activations runs the encoder on the GPU
+                try:
+                    logger.info(f"Loading faster-whisper model {model} on CUDA (int8_float16)...")
+                    self.whisper = WhisperModel(model, device="cuda", compute_type="int8_float16")
+                    self.stt_device = "cuda"
+                except Exception as e:
+                    logger.warning(f"Could not load Whisper on CUDA, using CPU: {e}")
+            if self.whisper is None:
+                logger.info(f"Loading faster-whisper model {model} (int8)...")
+                self.whisper = WhisperModel(
+                    model, device="cpu", compute_type="int8", cpu_threads=STT_THREADS
+                )
+                self.stt_device = "cpu"
+            _fuse_mel_frontend(self.whisper.feature_extractor)
+            self.stt_backend = "faster_whisper"
+            logger.info("Whisper model loaded successfully")
+            return True
+        
+        # Fall back to the whisper.cpp Python bindings
+        from whisper_cpp import Whisper
+        
+        model_path = next(
+            (path for path in (WHISPER_MODEL_PATH, WHISPER_FP32_MODEL_PATH) if os.path.exists(path)),
+            None
+        )
+        if model_path is None:
+            logger.warning(f"Whisper model not found at {WHISPER_MODEL_PATH}")
+            return False
+        
+        logger.info(f"Loading Whisper model from {model_path}...")
+        self.whisper = Whisper(model_path, n_threads=STT_THREADS, use_gpu=False)
+        self.stt_device = "cpu"
+        self.stt_backend = "whisper_cpp"
+        logger.info("Whisper model loaded successfully")
+        return True
+    
     def _init_tts(self) -> bool:
         """Initialize the text-to-speech system"""
+        if not HAS_SOUNDDEVICE:
+            logger.warning("sounddevice not installed, no audio output")
+            logger.info("TTS not available. Using text-only mode.")
+            return False
+        
         try:
             # Try to import piper TTS
             from piper import PiperVoice
+            from piper.config import PiperConfig
+            import onnxruntime as ort
             
-            if not os.path.exists(PIPER_MODEL_DIR):
+            if _PIPER_VOICES is None:
                 logger.warning(f"Piper models not found at {PIPER_MODEL_DIR}")
                 logger.info("TTS not available. Using text-only mode.")
                 return False
             
-            # Find available voice models
-            voice_files = [f for f in os.listdir(PIPER_MODEL_DIR) 
-                          if f.endswith('.onnx')]
-            
-            if not voice_files:
+            if not _PIPER_VOICES:
                 logger.warning("No Piper voice models found")
                 return False
             
-            # Use the first available voice
-            voice_path = os.path.join(PIPER_MODEL_DIR, voice_files[0])
-            config_path = voice_path.replace('.onnx', '.json')
+            # Use the first available voice from the snapshot taken at import
+            model_path, config_path = _PIPER_VOICES[0]
             
-            if not os.path.exists(config_path):
-                logger.warning(f"Voice config not found: {config_path}")
-                return False
+            logger.info(f"Loading Piper TTS voice: {os.path.basename(model_path)}...")
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = PiperConfig.from_dict(json.load(f))
+            
+            # Build the ONNX session ourselves: PiperVoice.load uses default options,
+            # which size the thread pool without regard to STT, and never tries the GPU
+            sess_options = ort.SessionOptions()
+            sess_options.intra_op_num_threads = TTS_THREADS
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            providers = [
+                provider for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+                if provider in ort.get_available_providers()
+            ]
+            session = ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
             
-            logger.info(f"Loading Piper TTS voice: {voice_files[0]}...")
-            self.piper = PiperVoice(voice_path, config_path)
-            logger.info("Piper TTS loaded successfully")
+            self.piper = PiperVoice(session=session, config=config)
+            logger.info(f"Piper TTS loaded successfully ({session.get_providers()[0]})")
             
             return True
         except ImportError:
@@ -103,6 +346,38 @@ class VoiceAssistant:
             logger.error(f"Error initializing TTS: {e}")
             return False
     
+    def _prewarm(self):
+        """Run one throwaway transcription and synthesis, then optionally pin memory (VOICE_MLOCK)"""
+        try:
+            if self.stt_available:
+                self._transcribe(np.zeros(SAMPLE_RATE, dtype=np.int16))
+            if self.tts_available:
+                for _ in self._synthesize_pcm16("warmup"):
+                    pass
+            
+            if VOICE_MLOCK:
+                self._lock_memory()
+        except Exception as e:
+            logger.warning(f"Voice model warmup failed: {e}")
+        finally:
+            self._warm.set()
+    
+    def _lock_memory(self):
+        """mlockall() the current mappings so model weights aren't paged out between utterances
+        
+        This covers the whole process, including the GGUF and the mmap'd knowledge base.
+        """
+        if not sys.platform.startswith("linux"):
+            return
+        
+        MCL_CURRENT = 1
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        if libc.mlockall(MCL_CURRENT) != 0:
+            logger.info(f"Could not lock model memory ({os.strerror(ctypes.get_errno())}); "
+                        f"raise RLIMIT_MEMLOCK to keep weights resident")
+        else:
+            logger.info("Process memory locked (VOICE_MLOCK)")
+    
     def _init_wake_word(self) -> bool:
         """Initialize the wake word detection system"""
         try:
@@ -130,39 +405,70 @@ class VoiceAssistant:
             return None
         
         try:
-            import pyaudio
-            import numpy as np
-            
+            self._warm.wait()
             logger.info("Listening...")
             
-            CHUNK = 1024
-            FORMAT = pyaudio.paInt16
-            CHANNELS = 1
-            RATE = 16000
-            RECORD_SECONDS = 5
-            
-            stream = self.pyaudio.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                input=True,
-                frames_per_buffer=CHUNK
-            )
-            
-            frames = []
-            
-            for _ in range(0, int(RATE / CHUNK * RECORD_SECONDS)):
-                data = stream.read(CHUNK)
-                frames.append(data)
-            
-            stream.stop_stream()
-            stream.close()
+            max_samples = SAMPLE_RATE * MAX_RECORD_SECONDS
+            if self._pcm_buffer is None:
+                self._pcm_buffer = np.empty(max_samples, dtype=np.int16)
+            pcm = self._pcm_buffer
+            # Byte view of the buffer so each PyAudio block is copied in once, with no array wrapper
+            pcm_bytes = memoryview(pcm).cast("B")
+            frame_bytes = FRAME_SAMPLES * pcm.itemsize
+            block_bytes = BLOCK_SAMPLES * pcm.itemsize
+            
+            stream = self._mic_stream
+            # Half-duplex: wait for an answer being spoken to finish so the mic doesn't record it,
+            # and keep speak() from starting until this utterance is captured
+            with self._audio_lock:
+                stream.start_stream()
+                try:
+                    # Record blocks straight into the preallocated buffer until the speaker goes quiet;
+                    # speech detection still runs on the 30 ms frames inside each block
+                    offset = 0
+                    heard_speech = False
+                    silent_frames = 0
+                    done = False
+                    no_speech_samples = SAMPLE_RATE * NO_SPEECH_SECONDS
+                    while not done and offset + BLOCK_SAMPLES <= max_samples:
+                        data = stream.read(BLOCK_SAMPLES, exception_on_overflow=False)
+                        start = offset * pcm.itemsize
+                        pcm_bytes[start:start + block_bytes] = data
+                        block = pcm[offset:offset + BLOCK_SAMPLES]
+                        offset += BLOCK_SAMPLES
+                        
+                        if self.vad is not None:
+                            frames = memoryview(data)
+                            speech = [self.vad.is_speech(frames[i:i + frame_bytes], SAMPLE_RATE)
+                                      for i in range(0, block_bytes, frame_bytes)]
+                        else:
+                            # Mean-square energy per frame in one reduction, compared without the sqrt
+                            speech = np.square(block.reshape(BLOCK_FRAMES, FRAME_SAMPLES), dtype=np.float32).mean(axis=1)
+                            speech = speech >= ENERGY_THRESHOLD ** 2
+                        
+                        for is_speech in speech:
+                            if is_speech:
+                                heard_speech = True
+                                silent_frames = 0
+                            elif heard_speech:
+                                silent_frames += 1
+                                if silent_frames >= VAD_SILENCE_FRAMES:
+                                    done = True
+                                    break
+                        
+                        if not heard_speech and offset >= no_speech_samples:
+                            break
+                finally:
+                    stream.stop_stream()  # Leave the shared stream ready for the next call
+            
+            if not heard_speech:
+                logger.info("No speech detected")
+                return None
             
-            # Convert audio data to numpy array
-            audio_data = np.frombuffer(b''.join(frames), dtype=np.int16)
+            audio_data = pcm[:offset]
             
             # Transcribe audio
-            result = self.whisper.transcribe(audio_data)
+            result = self._transcribe(audio_data)
             
             if result:
                 logger.info(f"Transcribed: {result}")
@@ -175,6 +481,99 @@ class VoiceAssistant:
             logger.error(f"Error listening: {e}")
             return None
     
+    def close(self):
+        """Release the microphone stream and the PortAudio instance"""
+        if self._mic_stream is not None:
+            self._mic_stream.close()
+            self._mic_stream = None
+        if self.pyaudio is not None:
+            self.pyaudio.terminate()
+            self.pyaudio = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _transcribe(self, audio_data) -> str:
+        """Transcribe 16 kHz mono int16 PCM with the loaded Whisper backend"""
+        if self.stt_backend == "faster_whisper":
+            # Scale int16 -> [-1, 1) float32 in one pass into a buffer reused across calls
+            if self._pcm_f32 is None or len(self._pcm_f32) < len(audio_data):
+                self._pcm_f32 = np.empty(max(SAMPLE_RATE * MAX_RECORD_SECONDS, len(audio_data)), dtype=np.float32)
+            audio = self._pcm_f32[:len(audio_data)]
+            np.multiply(audio_data, np.float32(1 / 32768), out=audio, dtype=np.float32)
+            
+            segments, _ = self.whisper.transcribe(audio, beam_size=1, vad_filter=True)
+            return " ".join(segment.text.strip() for segment in segments).strip()
+        
+        return self.whisper.transcribe(audio_data)
+    
+    def _cache_get(self, cache: OrderedDict, key: str):
+        """Look up an LRU entry and mark it most recently used"""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, cache: OrderedDict, key: str, value, max_size: int):
+        """Store an LRU entry, evicting the least recently used one when full"""
+        with self._cache_lock:
+            cache[key] = value
+            if len(cache) > max_size:
+                cache.popitem(last=False)
+    
+    def answer(self, query: str) -> str:
+        """Answer a query, reusing the previous RAG answer for a repeated question"""
+        # LLM answers depend on the conversation so far, which changes every turn, so only
+        # RAG-only answers (a function of the query alone) are cached
+        if self.llm_assistant.llm_available:
+            return self.llm_assistant.process_query(query)
+        
+        key = " ".join(query.lower().split())
+        answer = self._cache_get(self._answer_cache, key)
+        if answer is None:
+            answer = self.llm_assistant.process_query(query)
+            self._cache_put(self._answer_cache, key, answer, ANSWER_CACHE_SIZE)
+        else:
+            logger.info("Answer cache hit")
+            self.llm_assistant.conversation_history.append({"user": query, "assistant": answer})
+        return answer
+    
+    def answer_stream(self, query: str) -> Iterator[str]:
+        """Yield the answer to a query in pieces; LLM answers arrive a sentence at a time"""
+        if self.llm_assistant.llm_available:
+            yield from self.llm_assistant.process_query_stream(query)
+        else:
+            yield self.answer(query)
+    
+    def _synthesize_pcm16(self, text: str):
+        """Yield each sentence of text as 16-bit PCM bytes
+        
+        Same model call as PiperVoice.synthesize_stream_raw, but the float output is
+        peak-normalized in place and cast to int16 once, and the bytes are a view of that
+        array rather than another copy.
+        """
+        config = self.piper.config
+        scales = np.array([config.noise_scale, config.length_scale, config.noise_w], dtype=np.float32)
+        
+        for phonemes in self.piper.phonemize(text):
+            phoneme_ids = np.array([self.piper.phonemes_to_ids(phonemes)], dtype=np.int64)
+            inputs = {
+                "input": phoneme_ids,
+                "input_lengths": np.array([phoneme_ids.shape[1]], dtype=np.int64),
+                "scales": scales,
+            }
+            if config.num_speakers > 1:
+                inputs["sid"] = np.array([0], dtype=np.int64)  # Default speaker
+            
+            audio = self.piper.session.run(None, inputs)[0].reshape(-1)
+            peak = max(0.01, float(audio.max()), -float(audio.min()))
+            audio *= 32767.0 / peak  # |audio| <= peak, so no clip is needed before the cast
+            yield audio.astype(np.int16).data.cast("B")
+    
     def speak(self, text: str) -> bool:
         """Convert text to speech and play it"""
         if not self.tts_available:
@@ -182,67 +581,147 @@ class VoiceAssistant:
             return False
         
         try:
-            import sounddevice as sd
-            import numpy as np
-            
+            self._warm.wait()
             logger.info(f"Speaking: {text[:50]}...")
             
-            # Generate audio from text
-            audio_data = self.piper(text)
-            
-            # Play audio
-            sd.play(audio_data, self.piper.sample_rate)
-            sd.wait()
-            
-            return True
+            # Never play while listen() is recording, or the mic would pick the answer up
+            with self._audio_lock:
+                return self._play(text)
         except Exception as e:
             logger.error(f"Error speaking: {e}")
             return False
     
+    def _play(self, text: str) -> bool:
+        """Synthesize and play text; the caller holds the audio lock"""
+        # Replay the waveform of an answer we have already synthesized
+        cached = self._cache_get(self._tts_cache, text)
+        if cached is not None:
+            sd.play(np.frombuffer(cached, dtype=np.int16), self.piper.config.sample_rate)
+            sd.wait()
+            return True
+        
+        # Synthesis yields 16-bit PCM one sentence at a time; the output callback plays each
+        # sentence as soon as it is ready instead of waiting for the whole answer
+        chunks = queue.Queue()
+        pending = bytearray()
+        synthesis_done = threading.Event()
+        playback_done = threading.Event()
+        
+        def fill_output(outdata, frames, time_info, status):
+            while len(pending) < len(outdata) and not chunks.empty():
+                chunk = chunks.get_nowait()
+                if chunk is None:
+                    synthesis_done.set()
+                else:
+                    pending.extend(chunk)
+            
+            n = min(len(outdata), len(pending))
+            outdata[:n] = pending[:n]
+            del pending[:n]
+            if n < len(outdata):
+                outdata[n:] = bytes(len(outdata) - n)  # Silence while the next sentence renders
+                if synthesis_done.is_set():
+                    raise sd.CallbackStop
+        
+        with sd.RawOutputStream(
+            samplerate=self.piper.config.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=1024,
+            callback=fill_output,
+            finished_callback=playback_done.set
+        ):
+            rendered = []
+            for chunk in self._synthesize_pcm16(text):
+                chunks.put(chunk)
+                rendered.append(chunk)
+            chunks.put(None)
+            self._cache_put(self._tts_cache, text, b"".join(rendered), TTS_CACHE_SIZE)
+            playback_done.wait()
+        
+        return True
+    
     def run_voice_mode(self):
         """Run the assistant in voice mode"""
         if not self.stt_available:
             logger.error("STT not available. Cannot run in voice mode.")
             return
         
-        print("\n" + "="*50)
-        print("SmartFix AI Voice Assistant")
-        print("="*50)
-        print("Press Enter to start listening, or type 'exit' to quit")
-        print("="*50 + "\n")
+        print(VOICE_HEADER)
+        
+        asyncio.run(self._voice_pipeline())
+    
+    async def _voice_pipeline(self):
+        """Capture+STT -> LLM -> TTS stages joined by bounded queues
+        
+        Answers are streamed sentence by sentence, so the first sentences are spoken while the
+        LLM is still generating the rest. Recording only starts once playback has finished.
+        """
+        loop = asyncio.get_running_loop()
+        queries = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        answers = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        
+        def generate(query):
+            # Runs in the executor: print each sentence and queue it for TTS as soon as it exists
+            print("\nAssistant: ", end="", flush=True)
+            for piece in self.answer_stream(query):
+                print(piece, end="", flush=True)
+                asyncio.run_coroutine_threadsafe(answers.put(piece), loop).result()
+            print()
+        
+        async def respond():
+            while True:
+                query = await queries.get()
+                try:
+                    await loop.run_in_executor(None, generate, query)
+                except Exception as e:
+                    # Keep the stage alive; the capture loop is waiting on queries.join()
+                    logger.error(f"Error answering query: {e}")
+                    print("\nSorry, something went wrong while answering. Please try again.")
+                finally:
+                    queries.task_done()
+        
+        async def speak():
+            while True:
+                piece = await answers.get()
+                try:
+                    if self.tts_available and piece.strip():
+                        await loop.run_in_executor(None, self.speak, piece.strip())
+                finally:
+                    answers.task_done()
+        
+        workers = [asyncio.create_task(respond()), asyncio.create_task(speak())]
         
         while True:
-            input("Press Enter to start listening...")
+            command = await loop.run_in_executor(None, input, "Press Enter to start listening...")
+            if command.strip().lower() in ("exit", "quit", "bye"):
+                break
+            
+            # Let the rest of the previous answer finish playing before opening the mic
+            await answers.join()
             
             # Listen for speech
-            query = self.listen()
+            query = await loop.run_in_executor(None, self.listen)
             
             if not query:
                 print("I didn't catch that. Please try again.")
                 continue
             
             print(f"\nYou: {query}")
-            
-            # Process query
-            answer = self.llm_assistant.process_query(query)
-            
-            print(f"\nAssistant: {answer}")
-            
-            # Speak the answer
-            if self.tts_available:
-                self.speak(answer)
+            await queries.put(query)
+            # Finish generating (and printing) the answer before prompting again
+            await queries.join()
+        
+        # Let queued turns finish before shutting the stages down
+        await queries.join()
+        await answers.join()
+        for worker in workers:
+            worker.cancel()
+        print("\nThank you for using SmartFix AI. Goodbye!")
     
     def run_text_mode(self):
         """Run the assistant in text mode"""
-        print("\n" + "="*50)
-        print("SmartFix AI Troubleshooting Assistant")
-        print("="*50)
-        if self.llm_assistant.llm_available:
-            print("Running with local LLM for enhanced responses")
-        else:
-            print("Running in RAG-only mode (no LLM)")
-        print("Ask a troubleshooting question (type 'exit' to quit)")
-        print("="*50 + "\n")
+        print(TEXT_HEADERS[bool(self.llm_assistant.llm_available)])
         
         while True:
             query = input("\nYou: ").strip()
@@ -253,7 +732,7 @@ class VoiceAssistant:
             if not query:
                 continue
             
-            answer = self.llm_assistant.process_query(query)
+            answer = self.answer(query)
             print("\nAssistant:\n" + answer)
 
 def main():
@@ -1,14 +1,17 @@
 import requests
-import json
+import orjson
+
+# One keep-alive session so both checks reuse a pooled connection
+SESSION = requests.Session()
 
 def test_assistant_status():
     """Test the assistant status endpoint"""
     url = "http://localhost:8000/api/v1/assistant/status"
     
     try:
-        response = requests.get(url)
+        response = SESSION.get(url)
         print(f"Status Code: {response.status_code}")
-        print(json.dumps(response.json(), indent=2))
+        print(orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode())
         return response.status_code == 200
     except Exception as e:
         print(f"Error: {e}")
@@ -23,9 +26,9 @@ def test_assistant_query():
     }
     
     try:
-        response = requests.post(url, json=data)
+        response = SESSION.post(url, json=data)
         print(f"Status Code: {response.status_code}")
-        print(json.dumps(response.json(), indent=2))
+        print(orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode())
         return response.status_code == 200
     except Exception as e:
         print(f"Error: {e}")
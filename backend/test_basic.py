@@ -6,13 +6,25 @@ Tests core functionality and endpoints
 
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://127.0.0.1:8000"
 
+# One keep-alive session per worker thread: the checks run concurrently and
+# requests.Session is not documented as thread-safe
+_thread_local = threading.local()
+
+def get_session():
+    """Return the calling thread's requests.Session"""
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
 def test_health():
     """Test health endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = get_session().get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print("✅ Health check: PASSED")
             return True
@@ -30,7 +42,7 @@ def test_text_query():
             "text_query": "My computer is running slow",
             "user_id": "test_user"
         }
-        response = requests.post(f"{BASE_URL}/api/v1/query/text", json=payload)
+        response = get_session().post(f"{BASE_URL}/api/v1/query/text", json=payload)
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Text query: PASSED (Query ID: {data.get('query_id', 'N/A')})")
@@ -45,7 +57,7 @@ def test_text_query():
 def test_database_stats():
     """Test database statistics endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/v1/query/database/stats")
+        response = get_session().get(f"{BASE_URL}/api/v1/query/database/stats")
         if response.status_code == 200:
             data = response.json()
             stats = data.get('stats', {})
@@ -69,13 +81,13 @@ def main():
         ("Database Stats", test_database_stats)
     ]
     
-    passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        print(f"\n🔍 Testing: {test_name}")
-        if test_func():
-            passed += 1
+    # The checks are independent round-trips, so run them side by side
+    print(f"\n🔍 Testing: {', '.join(test_name for test_name, _ in tests)}")
+    with ThreadPoolExecutor(max_workers=total) as executor:
+        results = list(executor.map(lambda test: test[1](), tests))
+    passed = sum(results)
     
     print("\n" + "=" * 40)
     print(f"📊 Results: {passed}/{total} tests passed")